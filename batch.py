@@ -0,0 +1,16 @@
+# Headless batch baking with the VRM-Spacing-Animation-Baking add-on, see "Batch Processing" in the README.
+# Run with: blender -b -P batch.py -- --manifest clips.json [--workers 8] [--summary batch_summary.json]
+# The add-on package next to this script is loaded from its folder, so it doesn't have to be installed.
+
+import importlib.util
+import os
+import sys
+
+package_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vrm_spacing_animation_baking")
+spec = importlib.util.spec_from_file_location("vrm_spacing_animation_baking", os.path.join(package_dir, "__init__.py"),
+                                              submodule_search_locations=[package_dir])
+addon = sys.modules[spec.name] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(addon)
+
+if __name__ == "__main__":
+    sys.exit(addon.batch_main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []))
@@ -0,0 +1,337 @@
+# Benchmark for the VRM-Spacing-Animation-Baking operators on synthetic VRoid-scale rigs.
+# Run headless with: blender -b -P benchmark.py -- [--bones 50,150,500] [--frames 250,1000,10000] [--output results.json]
+# Every (bones, frames) size gets a fresh armature and action, and each operator is timed on its own copy of the action.
+# compare_engines (opt-in) checks the NumPy spring simulation and curve evaluation against Blender's own results.
+
+import bpy
+import argparse
+import json
+import math
+import importlib.util
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+# The add-on package next to this script, loaded from its folder so it doesn't have to be installed
+package_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vrm_spacing_animation_baking")
+spec = importlib.util.spec_from_file_location("vrm_spacing_animation_baking", os.path.join(package_dir, "__init__.py"),
+                                              submodule_search_locations=[package_dir])
+addon = sys.modules[spec.name] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(addon)
+
+# Body bones of the synthetic rig, as (name, parent, head, tail), using the names the spacing bone pairs expect
+body_bones = [
+    ("J_Bip_C_Hips", None, (0.0, 0.0, 1.0), (0.0, 0.0, 1.1)),
+    ("J_Bip_C_Spine", "J_Bip_C_Hips", (0.0, 0.0, 1.1), (0.0, 0.0, 1.2)),
+    ("J_Bip_C_Chest", "J_Bip_C_Spine", (0.0, 0.0, 1.2), (0.0, 0.0, 1.3)),
+    ("J_Bip_C_UpperChest", "J_Bip_C_Chest", (0.0, 0.0, 1.3), (0.0, 0.0, 1.4)),
+    ("J_Bip_C_Neck", "J_Bip_C_UpperChest", (0.0, 0.0, 1.4), (0.0, 0.0, 1.5)),
+    ("J_Bip_C_Head", "J_Bip_C_Neck", (0.0, 0.0, 1.5), (0.0, 0.0, 1.7)),
+    ("J_Bip_L_Shoulder", "J_Bip_C_UpperChest", (0.05, 0.0, 1.4), (0.15, 0.0, 1.4)),
+    ("J_Bip_L_UpperArm", "J_Bip_L_Shoulder", (0.15, 0.0, 1.4), (0.4, 0.0, 1.4)),
+    ("J_Bip_L_LowerArm", "J_Bip_L_UpperArm", (0.4, 0.0, 1.4), (0.65, 0.0, 1.4)),
+    ("J_Bip_R_Shoulder", "J_Bip_C_UpperChest", (-0.05, 0.0, 1.4), (-0.15, 0.0, 1.4)),
+    ("J_Bip_R_UpperArm", "J_Bip_R_Shoulder", (-0.15, 0.0, 1.4), (-0.4, 0.0, 1.4)),
+    ("J_Bip_R_LowerArm", "J_Bip_R_UpperArm", (-0.4, 0.0, 1.4), (-0.65, 0.0, 1.4)),
+    ("J_Bip_L_UpperLeg", "J_Bip_C_Hips", (0.1, 0.0, 1.0), (0.1, 0.0, 0.55)),
+    ("J_Bip_L_LowerLeg", "J_Bip_L_UpperLeg", (0.1, 0.0, 0.55), (0.1, 0.0, 0.1)),
+    ("J_Bip_R_UpperLeg", "J_Bip_C_Hips", (-0.1, 0.0, 1.0), (-0.1, 0.0, 0.55)),
+    ("J_Bip_R_LowerLeg", "J_Bip_R_UpperLeg", (-0.1, 0.0, 0.55), (-0.1, 0.0, 0.1))
+]
+
+# Physics chain kinds: name prefix, parent bone, share of the physics bones
+physics_chain_kinds = [
+    ("J_Sec_Hair", "J_Bip_C_Head", 0.6),
+    ("J_Sec_Skirt", "J_Bip_C_Hips", 0.3),
+    ("J_Sec_Bust", "J_Bip_C_Chest", 0.1)
+]
+
+# Operators the benchmark times by default, and every operator it can run
+default_operators = ("spacing", "delete", "loopify", "bake_visual", "bake_spring")
+benchmark_operators = default_operators + ("compare_engines",)
+
+# Largest difference allowed between the add-on's curve evaluation and FCurve.evaluate
+evaluation_tolerance = 1e-4
+# Frames of each curve compared with FCurve.evaluate, in half frames, so long clips stay quick to check
+evaluation_frames = 250
+
+
+# Lays out physics chains of chain_length bones until bone_count bones exist, split between hair, skirt and bust.
+def physics_chains(bone_count, chain_length):
+    chains = []
+    for prefix, parent, share in physics_chain_kinds:
+        chain_count = max(1, round(bone_count * share / chain_length))
+        for chain in range(chain_count):
+            angle = 2.0 * math.pi * chain / chain_count
+            chains.append((prefix, parent, chain + 1, angle))
+    return chains
+
+
+def build_armature(physics_bone_count, chain_length):
+    armature_data = bpy.data.armatures.new("BenchmarkRig")
+    armature = bpy.data.objects.new("BenchmarkRig", armature_data)
+    bpy.context.scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+    armature.select_set(True)
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bones = armature_data.edit_bones
+    for name, parent, head, tail in body_bones:
+        bone = edit_bones.new(name)
+        bone.head, bone.tail = head, tail
+        if parent:
+            bone.parent = edit_bones[parent]
+
+    physics_bones = []
+    for prefix, parent_name, number, angle in physics_chains(physics_bone_count, chain_length):
+        parent = edit_bones[parent_name]
+        direction = (math.cos(angle) * 0.05, math.sin(angle) * 0.05, -0.05)
+        head = parent.tail
+        for link in range(chain_length):
+            bone = edit_bones.new(f"{prefix}{number}_{link + 1}")
+            bone.head = head
+            bone.tail = (head[0] + direction[0], head[1] + direction[1], head[2] + direction[2])
+            bone.parent = parent
+            parent, head = bone, bone.tail
+            physics_bones.append(bone.name)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Body bones are keyed in Euler like retargeted clips, physics bones in quaternions like a VRM bake
+    for pose_bone in armature.pose.bones:
+        pose_bone.rotation_mode = 'QUATERNION' if pose_bone.name in physics_bones else 'XYZ'
+
+    has_springs = add_spring_bones(armature, physics_bones, chain_length)
+    return armature, physics_bones, has_springs
+
+
+# Mirrors the physics chains as VRM spring bone data when the VRM add-on is installed, for the spring simulation bake.
+def add_spring_bones(armature, physics_bones, chain_length):
+    try:
+        spring_bone1 = armature.data.vrm_addon_extension.spring_bone1
+    except AttributeError:
+        return False
+    for start in range(0, len(physics_bones), chain_length):
+        spring = spring_bone1.springs.add()
+        for bone_name in physics_bones[start:start + chain_length]:
+            joint = spring.joints.add()
+            joint.node.bone_name = bone_name
+    return True
+
+
+# Keys every bone on every frame with smooth, distinct motion, written in bulk like a baked clip.
+def build_action(armature, frame_count):
+    action = bpy.data.actions.new("BenchmarkAction")
+    frames = np.arange(1, frame_count + 1, dtype=np.float64)
+    for bone_number, pose_bone in enumerate(armature.pose.bones):
+        phase = bone_number * 0.37
+        if pose_bone.rotation_mode == 'QUATERNION':
+            half = 0.2 * np.sin(frames / 15.0 + phase)
+            channels = [("rotation_quaternion", np.cos(half)), ("rotation_quaternion", np.sin(half)),
+                        ("rotation_quaternion", np.zeros_like(half)), ("rotation_quaternion", np.zeros_like(half))]
+        else:
+            channels = [("rotation_euler", 0.3 * np.sin(frames / (20.0 + axis) + phase)) for axis in range(3)]
+        for array_index, (channel, values) in enumerate(channels):
+            fcurve = action.fcurves.new(f"pose.bones[\"{pose_bone.name}\"].{channel}", index=array_index, action_group=pose_bone.name)
+            addon.write_keyframe_table(fcurve, addon.sampled_keyframe_table(frames, values))
+
+    if armature.animation_data is None:
+        armature.animation_data_create()
+    armature.animation_data.action = action
+    return action
+
+
+def select_bones(armature, bone_names):
+    bone_names = set(bone_names)
+    for bone in armature.data.bones:
+        bone.select = bone.name in bone_names
+
+
+# Times one operator on a fresh copy of the source action, leaving the source untouched for the next operator.
+def time_operator(armature, source_action, operator, physics_bones):
+    scene = bpy.context.scene
+    action = source_action.copy()
+    armature.animation_data.action = action
+    bpy.context.view_layer.objects.active = armature
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    if operator == "spacing":
+        scene.selected_bone_pair = 'UPPER_ARM'
+        run = bpy.ops.object.adjust_spacing
+    elif operator == "delete":
+        bpy.ops.object.mode_set(mode='POSE')
+        select_bones(armature, physics_bones)
+        run = bpy.ops.object.delete_highlighted_bones
+    elif operator == "loopify":
+        select_bones(armature, physics_bones)
+        run = bpy.ops.object.loopify_physics
+    else:
+        scene.bake_engine = 'SPRING_SIMULATION' if operator == "bake_spring" else 'VISUAL_KEYING'
+        scene.bake_physics_only = True
+        run = bpy.ops.object.adjust_playback_and_bake
+
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    # The operator's own run record breaks the time down into phases and counts the work done
+    record = addon.operator_run_history[0] if addon.operator_run_history else {}
+
+    armature.animation_data.action = source_action
+    bpy.data.actions.remove(action)
+    return seconds, sorted(result), record
+
+
+# Angle between two (frames, 4) quaternion arrays on each frame, in degrees.
+def quaternion_angles(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.degrees(2.0 * np.arccos(np.clip(np.abs(np.sum(a * b, axis=1)), 0.0, 1.0)))
+
+
+# Compares the two bake engines on copies of the source action without the physics bones' keys, as after Delete
+# Highlighted Bones: both bake the physics bones, the spring simulation with the add-on's NumPy solver and Visual Keying
+# from the VRM add-on's own physics, and the largest angle between their rotations of any joint on any frame must stay
+# within tolerance. Also checks the NumPy curve evaluation the simulation samples its inputs with against
+# FCurve.evaluate on the source curves.
+def compare_engines(armature, source_action, physics_bones, tolerance):
+    scene = bpy.context.scene
+    bpy.context.view_layer.objects.active = armature
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    settings = (scene.bake_engine, scene.bake_physics_only, scene.use_bake_cache, scene.use_incremental_bake)
+    spring_bone1 = armature.data.vrm_addon_extension.spring_bone1
+    enabled = spring_bone1.enable_animation
+    spring_bone1.enable_animation = True
+    scene.bake_engine = 'SPRING_SIMULATION'
+    joints = sorted(addon.get_baked_bone_names(scene, armature))
+    frames = np.arange(int(source_action.frame_range[0]), int(source_action.frame_range[1]) + 1, dtype=np.float64)
+
+    start = time.perf_counter()
+    cleared_action = source_action.copy()
+    for fcurve in addon.find_bone_fcurves(cleared_action, physics_bones):
+        cleared_action.fcurves.remove(fcurve)
+    addon.invalidate_action_fcurve_index(cleared_action)
+
+    rotations = {}
+    for engine in ('SPRING_SIMULATION', 'VISUAL_KEYING'):
+        action = cleared_action.copy()
+        armature.animation_data.action = action
+        scene.bake_engine = engine
+        scene.bake_physics_only = True
+        scene.use_bake_cache = False
+        scene.use_incremental_bake = False
+        bpy.ops.object.adjust_playback_and_bake()
+        rotations[engine] = {bone_name: addon.sample_bone_channel(action, armature.pose.bones[bone_name], "rotation_quaternion", frames) for bone_name in joints}
+        armature.animation_data.action = source_action
+        bpy.data.actions.remove(action)
+    bpy.data.actions.remove(cleared_action)
+    spring_bone1.enable_animation = enabled
+    scene.bake_engine, scene.bake_physics_only, scene.use_bake_cache, scene.use_incremental_bake = settings
+    angle = max((float(quaternion_angles(rotations['SPRING_SIMULATION'][bone_name], rotations['VISUAL_KEYING'][bone_name]).max()) for bone_name in joints), default=0.0)
+
+    sample_frames = np.arange(frames[0], min(frames[-1], frames[0] + evaluation_frames) + 0.25, 0.5)
+    evaluation_error = 0.0
+    for fcurve in source_action.fcurves:
+        values = addon.evaluate_keyframe_table(addon.read_keyframe_table(fcurve), sample_frames)
+        evaluated = np.array([fcurve.evaluate(frame) for frame in sample_frames])
+        evaluation_error = max(evaluation_error, float(np.abs(values - evaluated).max()))
+
+    return {
+        "seconds": time.perf_counter() - start,
+        "joints": len(joints),
+        "max_angle": angle,
+        "angle_tolerance": tolerance,
+        "evaluation_error": evaluation_error,
+        "within_tolerance": angle <= tolerance and evaluation_error <= evaluation_tolerance
+    }
+
+
+def run_benchmark(bone_counts, frame_counts, operators, chain_length, repeat, engine_tolerance):
+    results = []
+    for bone_count in bone_counts:
+        for frame_count in frame_counts:
+            bpy.ops.wm.read_homefile(use_empty=True)
+            armature, physics_bones, has_springs = build_armature(max(0, bone_count - len(body_bones)), chain_length)
+            action = build_action(armature, frame_count)
+
+            for operator in operators:
+                # The spring simulation needs the VRM add-on's spring bone data
+                if operator in ("bake_spring", "compare_engines") and not has_springs:
+                    continue
+                if operator == "compare_engines":
+                    result = {"operator": operator, "bones": len(armature.data.bones), "physics_bones": len(physics_bones), "frames": frame_count}
+                    result.update(compare_engines(armature, action, physics_bones, engine_tolerance))
+                    results.append(result)
+                    status = "ok" if result["within_tolerance"] else "OUT OF TOLERANCE"
+                    print(f"{operator:<12} bones={result['bones']:<5} frames={frame_count:<6} max angle {result['max_angle']:.3f} deg, "
+                          f"evaluation error {result['evaluation_error']:.2e} {status}")
+                    continue
+                timings = []
+                records = []
+                for _ in range(repeat):
+                    seconds, outcome, record = time_operator(armature, action, operator, physics_bones)
+                    timings.append(seconds)
+                    records.append(record)
+                fastest = records[timings.index(min(timings))]
+                result = {
+                    "operator": operator,
+                    "bones": len(armature.data.bones),
+                    "physics_bones": len(physics_bones),
+                    "frames": frame_count,
+                    "seconds": min(timings),
+                    "runs": timings,
+                    "result": outcome,
+                    "phases": fastest.get("phases", {}),
+                    "counters": fastest.get("counters", {})
+                }
+                results.append(result)
+                print(f"{operator:<12} bones={result['bones']:<5} frames={frame_count:<6} {result['seconds']:.4f}s {outcome}")
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="blender -b -P benchmark.py --", description="Times the add-on's operators on synthetic VRoid-scale rigs.")
+    parser.add_argument("--bones", default="50,150,500", help="Comma separated total bone counts")
+    parser.add_argument("--frames", default="250,1000,10000", help="Comma separated action lengths in frames")
+    parser.add_argument("--operators", default=",".join(default_operators), help=f"Comma separated operators among {', '.join(benchmark_operators)}")
+    parser.add_argument("--engine-tolerance", type=float, default=5.0, help="Largest angle in degrees compare_engines allows between the two bake engines")
+    parser.add_argument("--chain-length", type=int, default=4, help="Bones per physics chain")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per operator and size; the fastest is reported")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    operators = [operator for operator in args.operators.split(",") if operator]
+    unknown = set(operators) - set(benchmark_operators)
+    if unknown:
+        parser.error(f"Unknown operators: {', '.join(sorted(unknown))}")
+
+    if not hasattr(bpy.types, "OBJECT_OT_adjust_spacing"):
+        addon.register()
+
+    results = run_benchmark(
+        [int(count) for count in args.bones.split(",")],
+        [int(count) for count in args.frames.split(",")],
+        operators,
+        args.chain_length,
+        max(1, args.repeat),
+        args.engine_tolerance
+    )
+    report = {
+        "addon_version": ".".join(str(part) for part in addon.bl_info["version"]),
+        "blender_version": bpy.app.version_string,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []))
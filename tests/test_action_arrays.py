@@ -0,0 +1,193 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# vrm_action_arrays only needs NumPy, so it's imported on its own rather than through the add-on package (which needs bpy)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vrm_spacing_animation_baking"))
+
+import vrm_action_arrays as arrays_module  # noqa: E402
+from vrm_action_arrays import (  # noqa: E402
+    ActionArrays, bake_cache_digest, delete_action_bones, euler_to_matrix, evaluate_keyframe_table, loopify_action_arrays,
+    normalize_vectors, parse_pose_bone_data_path, quaternion_to_matrix, reduce_action_arrays, reduce_keys_mask,
+    sampled_keyframe_table, space_action_arrays, spacing_quaternion,
+)
+
+frames = np.arange(1, 41, dtype=float)
+
+
+def quaternion_curves(bone_name):
+    return [(f'pose.bones["{bone_name}"].rotation_quaternion', component, bone_name) for component in range(4)]
+
+
+@pytest.fixture
+def quaternions():
+    rng = np.random.default_rng(0)
+    return normalize_vectors(rng.normal(size=(len(frames), 4)) * 0.1 + [1.0, 0.0, 0.0, 0.0])
+
+
+# Bone "B" in quaternion mode, "E" in XYZ Euler and "H" with one location curve
+@pytest.fixture
+def action(quaternions):
+    curves = quaternion_curves("B")
+    curves += [('pose.bones["E"].rotation_euler', axis, "E") for axis in range(3)]
+    curves += [('pose.bones["H"].location', 0, "H")]
+    tables = [sampled_keyframe_table(frames, quaternions[:, component]) for component in range(4)]
+    tables += [sampled_keyframe_table(frames, np.sin(frames / (5 + axis))) for axis in range(3)]
+    tables += [sampled_keyframe_table(frames, frames)]
+    return ActionArrays(curves, tables)
+
+
+def test_parse_pose_bone_data_path():
+    assert parse_pose_bone_data_path('pose.bones["J_Bip_C_Hips"].location') == ("J_Bip_C_Hips", "location")
+    assert parse_pose_bone_data_path('pose.bones["A\\"B"].rotation_euler') == ('A"B', "rotation_euler")
+    assert parse_pose_bone_data_path("location") == (None, None)
+
+
+def test_evaluate_bezier_with_linear_handles():
+    table = sampled_keyframe_table(frames, 2 * frames + 1)
+    table["handle_left"] = table["co"] - np.array([1 / 3, 2 / 3], dtype=np.float32)
+    table["handle_right"] = table["co"] + np.array([1 / 3, 2 / 3], dtype=np.float32)
+    sample_frames = np.array([0.0, 1.5, 10.25, 39.9, 50.0])
+    # Outside the keys the curve holds its first and last values
+    expected = 2 * np.clip(sample_frames, 1, 40) + 1
+    assert np.allclose(evaluate_keyframe_table(table, sample_frames), expected, atol=1e-5)
+
+
+def test_evaluate_constant_interpolation():
+    table = sampled_keyframe_table(frames, 2 * frames + 1)
+    table["interpolation"][:] = 0
+    result = evaluate_keyframe_table(table, np.array([0.0, 1.5, 10.25, 39.9, 50.0]))
+    assert np.allclose(result, [3.0, 3.0, 21.0, 79.0, 81.0])
+
+
+def test_lookups(action):
+    assert len(action) == 8
+    assert action.find("B", "rotation_quaternion", 2) == 2
+    assert action.find("B", "location", 0) is None
+    assert action.bone_curves(["E", "H"]) == [4, 5, 6, 7]
+    assert action.bone_curves(["E"], "rotation_euler") == [4, 5, 6]
+
+
+def test_tables_are_read_only(action):
+    with pytest.raises(ValueError):
+        action.table(0)["co"][0, 1] = 5.0
+
+
+def test_spacing_quaternion_matches_euler_offset(action, quaternions):
+    offsets = {("B", 2): [0.1], ("E", 1): [0.1, 0.05], ("H", 0): [1.0]}
+    rotation_modes = {"B": 'QUATERNION', "E": 'XYZ', "H": 'XYZ'}
+    spaced, changed = space_action_arrays(action, offsets, rotation_modes, 1, 40)
+    assert changed == 200
+    assert len(spaced) == len(action)
+
+    # Quaternion keys end up rotated by the same offset an Euler bone gets added
+    rotated = np.stack([spaced.table(spaced.find("B", "rotation_quaternion", component))["co"][:, 1] for component in range(4)], 1)
+    expected = quaternion_to_matrix(spacing_quaternion([0.0, 0.0, 0.1])) @ quaternion_to_matrix(quaternions)
+    assert np.abs(quaternion_to_matrix(rotated) - expected).max() < 1e-6
+    assert np.allclose(spaced.table(5)["co"][:, 1] - action.table(5)["co"][:, 1], 0.15, atol=1e-6)
+    # Location curves aren't rotations and stay as they are, as does the input
+    assert np.array_equal(spaced.table(7)["co"], action.table(7)["co"])
+    assert np.array_equal(spaced.table(4)["co"], action.table(4)["co"])
+
+
+# Spaces a quaternion bone keyed with the given XYZ Euler poses, returning the spaced rotation matrices
+def spaced_quaternion_matrices(eulers, axis, delta):
+    matrices = euler_to_matrix(eulers, 'XYZ')
+    poses = normalize_vectors(np.stack([spacing_quaternion(euler) for euler in eulers]))
+    tables = [sampled_keyframe_table(frames, poses[:, component]) for component in range(4)]
+    spaced, _ = space_action_arrays(ActionArrays(quaternion_curves("B"), tables), {("B", axis): [delta]}, {"B": 'QUATERNION'}, 1, 40)
+    rotated = np.stack([spaced.table(component)["co"][:, 1] for component in range(4)], 1)
+    assert np.abs(quaternion_to_matrix(poses) - matrices).max() < 1e-6
+    return quaternion_to_matrix(rotated)
+
+
+# X and Y offsets turn quaternion bones about the rest axes, which is the Euler result only while the later axes are unposed
+@pytest.mark.parametrize("axis", [0, 1])
+def test_spacing_quaternion_x_and_y_offsets(axis):
+    rng = np.random.default_rng(axis)
+    eulers = rng.uniform(-0.5, 0.5, size=(len(frames), 3))
+    offset = np.zeros(3)
+    offset[axis] = 0.2
+
+    rotated = spaced_quaternion_matrices(eulers, axis, 0.2)
+    assert np.abs(rotated - euler_to_matrix(offset, 'XYZ') @ euler_to_matrix(eulers, 'XYZ')).max() < 1e-6
+    assert np.abs(rotated - euler_to_matrix(eulers + offset, 'XYZ')).max() > 1e-3
+
+    eulers[:, axis + 1:] = 0.0
+    rotated = spaced_quaternion_matrices(eulers, axis, 0.2)
+    assert np.abs(rotated - euler_to_matrix(eulers + offset, 'XYZ')).max() < 1e-6
+
+
+def test_spacing_adds_missing_quaternion_components(quaternions):
+    curves = quaternion_curves("B")[:3]
+    tables = [sampled_keyframe_table(frames, quaternions[:, component]) for component in range(3)]
+    spaced, changed = space_action_arrays(ActionArrays(curves, tables), {("B", 0): [0.2]}, {"B": 'QUATERNION'}, 1, 40,
+                                          {"B": (1.0, 0.0, 0.0, 0.0)})
+    assert len(spaced) == 4
+    assert changed == 120
+    assert spaced.curves[3] == ('pose.bones["B"].rotation_quaternion', 3, "B")
+
+
+def test_delete_action_bones(action):
+    deleted, keys_removed, curves_removed = delete_action_bones(action, ["E"])
+    assert (len(deleted), keys_removed, curves_removed) == (5, 120, 3)
+    assert deleted.find("E", "rotation_euler", 0) is None
+    assert deleted.find("H", "location", 0) == 4
+
+
+def test_loopify_interpolate(action):
+    looped, changed, inserted, seam_frames = loopify_action_arrays(action, 40, 1, 4, 0)
+    assert (changed, inserted, seam_frames) == (32, 8, [0, 0, 5])
+    # Frames 1-4 are replaced by the copy of frame 40 at frame 0
+    looped_frames = looped.table(0)["co"][:, 0]
+    assert len(looped_frames) == 37
+    assert looped_frames[0] == 0.0 and looped_frames[1] == 5.0
+    assert looped.table(0)["co"][0, 1] == action.table(0)["co"][-1, 1]
+
+
+def test_loopify_crossfade(action):
+    _, changed, inserted, seam_frames = loopify_action_arrays(action, 40, 1, 4, 0, 'CROSSFADE', 4, 'COSINE')
+    assert (changed, inserted, seam_frames) == (32, 8, [0, 0, 5])
+
+
+def test_reduce_keeps_protected_frames(action):
+    reduced, before, after = reduce_action_arrays(action, 0.01, 0.001, [20])
+    assert (before, after) == (320, 230)
+    # The straight location curve keeps its ends and the protected frame only
+    assert list(reduced.table(7)["co"][:, 0]) == [1.0, 20.0, 40.0]
+
+
+def test_reduced_curves_play_back_within_tolerance(action):
+    reduced, _, _ = reduce_action_arrays(action, 0.01, 0.001)
+    tolerances = [np.sin(0.005)] * 4 + [0.01] * 3 + [0.001]
+    for position, tolerance in enumerate(tolerances):
+        original = evaluate_keyframe_table(action.table(position), frames)
+        played = evaluate_keyframe_table(reduced.table(position), frames)
+        assert np.abs(played - original).max() <= tolerance + 1e-6
+    assert np.all(reduced.table(0)["interpolation"] == 1)
+
+
+def test_reduce_keys_mask_on_a_line():
+    mask = reduce_keys_mask(frames, 3 * frames, 1e-6)
+    assert mask.sum() == 2 and mask[0] and mask[-1]
+
+
+# Settings as bake_cache_key lays them out for a Visual Keying bake, with the spring physics on or off
+def visual_bake_settings(enable_animation):
+    return [[3, 'VISUAL_KEYING', False, [1.0, 40.0], 30, 1.0], ["B"], [], [], [], [], [[], []], [enable_animation, [], []]]
+
+
+def test_bake_cache_misses_when_physics_toggles(action):
+    tables = [action.table(index) for index in range(len(action))]
+    physics_off = bake_cache_digest(visual_bake_settings(False), tables)
+    assert bake_cache_digest(visual_bake_settings(False), tables) == physics_off
+    assert bake_cache_digest(visual_bake_settings(True), tables) != physics_off
+    # Any changed input key misses too
+    edited = dict(tables[7], co=tables[7]["co"] + [0.0, 1.0])
+    assert bake_cache_digest(visual_bake_settings(False), tables[:7] + [edited]) != physics_off
+
+
+def test_module_does_not_import_blender():
+    assert "bpy" not in vars(arrays_module)
@@ -0,0 +1,3408 @@
+bl_info = {
+    "name": "VRM-Spacing-Animation-Baking",
+    "author": "ingenoire",
+    "version": (1, 9, 8),
+    "blender": (2, 80, 0),
+    "location": "View3D > Sidebar > VRM Bake",
+    "description": "Adjusts spacing for VRM bones and provides animation baking tools.",
+    "category": "Animation",
+}
+
+import bpy
+import argparse
+import functools
+import json
+import math
+import os
+import re
+import subprocess
+import tempfile
+import time
+import mathutils
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from .vrm_action_arrays import (
+    keyframe_float_attributes, keyframe_enum_attributes, new_keyframe_enum_values, sampled_keyframe_table,
+    replace_keyframe_range, evaluate_keyframe_table, whole_frame_key_mask, offset_values, offset_keyframe_table,
+    pose_bone_data_path_pattern, parse_pose_bone_data_path, normalize_vectors, quaternion_to_matrix,
+    multiply_quaternions, euler_to_matrix, axis_angle_to_matrix, rotation_between, make_quaternions_continuous,
+    compose_matrices, spacing_quaternion, rotate_quaternion_tables, loopify_keyframe_table, seam_blend_weights,
+    extrapolated_key_values, crossfade_keyframe_tables, reduce_keys_mask, reduction_tolerance, bake_cache_digest,
+    ActionArrays, space_action_arrays, delete_action_bones, loopify_action_arrays, reduce_action_arrays
+)
+
+# List of bone pairs for dropdown menu
+bone_pairs = [
+    ("SHOULDER", "J_Bip_L_Shoulder", "J_Bip_R_Shoulder", "Shoulder", True),
+    ("UPPER_ARM", "J_Bip_L_UpperArm", "J_Bip_R_UpperArm", "Upper Arm", True),
+    ("LOWER_ARM", "J_Bip_L_LowerArm", "J_Bip_R_LowerArm", "Lower Arm", True),
+    ("UPPER_LEG", "J_Bip_L_UpperLeg", "J_Bip_R_UpperLeg", "Upper Leg", True),
+    ("LOWER_LEG", "J_Bip_L_LowerLeg", "J_Bip_R_LowerLeg", "Lower Leg", True),
+    ("SPINE", "J_Bip_C_Spine", None, "Spine", False),
+    ("CHEST", "J_Bip_C_Chest", None, "Chest", False),
+    ("UPPER_CHEST", "J_Bip_C_UpperChest", None, "Upper Chest", False),
+    ("NECK", "J_Bip_C_Neck", None, "Neck", False),
+    ("HEAD", "J_Bip_C_Head", None, "Head", False)
+]
+
+# Spacing axis choices, shared by the scene toggle and the spacing profile entries
+spacing_axis_items = [
+    ('SIDEWAYS', "Space Sideways (Z-Axis)", ""),
+    ('FORWARD_BACKWARD', "Space Forward/Backward (Y-Axis)", ""),
+    ('DEPTH', "Space Depth (X-Axis)", "")
+]
+
+# Add a toggle property for choosing spacing axis
+bpy.types.Scene.spacing_axis = bpy.props.EnumProperty(
+    name="Spacing Axis",
+    description="Choose which axis to apply the spacing on",
+    items=spacing_axis_items,
+    default='SIDEWAYS'
+)
+
+# Index of the rotation_euler channel each spacing axis adjusts
+spacing_axis_indices = {
+    'SIDEWAYS': 2,  # Z-axis
+    'FORWARD_BACKWARD': 1,  # Y-axis
+    'DEPTH': 0  # X-axis
+}
+
+# ----------------------------- Instrumentation -----------------------------
+# Every operator records its wall time per phase and a few work counters. The records are shown in the panel's stats box,
+# appended to the JSON-lines log file set in the panel, and included in the batch pipeline's clip results.
+
+# Counters every run starts with; helpers add to them through count_operator_stat
+operator_stat_counters = ("frame_set", "fcurves_touched", "fcurves_removed", "keys_modified", "keys_written", "keys_inserted", "keys_removed")
+
+# Runs in progress (operators can run other operators) and the most recent finished runs
+operator_run_stack = []
+operator_run_history = deque(maxlen=50)
+
+
+class OperatorRun:
+    def __init__(self, operator, context):
+        armature = getattr(context, "object", None)
+        anim_data = getattr(armature, "animation_data", None)
+        self.record = {
+            "operator": operator.bl_idname,
+            "label": operator.bl_label,
+            "object": armature.name if armature is not None else None,
+            "action": anim_data.action.name if anim_data is not None and anim_data.action is not None else None,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "phases": {},
+            "counters": dict.fromkeys(operator_stat_counters, 0),
+            "details": {}
+        }
+        self.start = time.perf_counter()
+
+
+def begin_operator_run(operator, context):
+    run = OperatorRun(operator, context)
+    operator_run_stack.append(run)
+    return run
+
+
+# Closes a run, keeps it for the stats box and appends it to the log file when one is set. Returns the record.
+def end_operator_run(run, result, context):
+    if run in operator_run_stack:
+        operator_run_stack.remove(run)
+    run.record["result"] = sorted(result)
+    run.record["seconds"] = time.perf_counter() - run.start
+    operator_run_history.appendleft(run.record)
+
+    log_path = getattr(context.scene, "operator_log_path", "") if context.scene is not None else ""
+    if log_path:
+        # A log that can't be written must never fail the operator itself
+        try:
+            with open(bpy.path.abspath(log_path), "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(run.record) + "\n")
+        except OSError as error:
+            print(f"VRM Bake: could not write operator log {log_path}: {error}")
+    return run.record
+
+
+def count_operator_stat(name, amount=1):
+    if operator_run_stack:
+        counters = operator_run_stack[-1].record["counters"]
+        counters[name] = counters.get(name, 0) + amount
+
+
+def record_operator_detail(name, value):
+    if operator_run_stack:
+        operator_run_stack[-1].record["details"][name] = value
+
+
+# Times a named phase of the running operator; phases with the same name add up.
+@contextmanager
+def operator_phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if operator_run_stack:
+            phases = operator_run_stack[-1].record["phases"]
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+# Steps the scene to a frame, counting it for the running operator.
+def counted_frame_set(scene, frame):
+    scene.frame_set(frame)
+    count_operator_stat("frame_set")
+
+
+# Wraps an operator's execute so every call is recorded, including the ones that fail.
+def instrumented_execute(execute):
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        run = begin_operator_run(self, context)
+        result = {'CANCELLED'}
+        try:
+            result = execute(self, context)
+        finally:
+            end_operator_run(run, result, context)
+        return result
+    return wrapper
+
+# ----------------------------- F-Curve Array Helpers -----------------------------
+
+
+# Reads every per-key attribute of an F-Curve into a dict of arrays, one row per key.
+def read_keyframe_table(fcurve):
+    keyframe_points = fcurve.keyframe_points
+    count = len(keyframe_points)
+    table = {}
+    for name, width in keyframe_float_attributes:
+        values = np.empty(count * width, dtype=np.float32)
+        keyframe_points.foreach_get(name, values)
+        table[name] = values.reshape(count, width) if width > 1 else values
+    for name in keyframe_enum_attributes:
+        values = np.empty(count, dtype=np.int32)
+        keyframe_points.foreach_get(name, values)
+        table[name] = values
+    return table
+
+
+# Replaces the keys of an F-Curve with a table from read_keyframe_table, resizing it once from the tail.
+def write_keyframe_table(fcurve, table):
+    count_operator_stat("fcurves_touched")
+    keyframe_points = fcurve.keyframe_points
+    count = len(table["co"])
+    if len(keyframe_points) < count:
+        keyframe_points.add(count - len(keyframe_points))
+    # Removing the last key never shifts the others, so shrinking stays linear
+    while len(keyframe_points) > count:
+        keyframe_points.remove(keyframe_points[-1], fast=True)
+
+    for name, _ in keyframe_float_attributes:
+        keyframe_points.foreach_set(name, np.ascontiguousarray(table[name], dtype=np.float32).ravel())
+    for name in keyframe_enum_attributes:
+        keyframe_points.foreach_set(name, np.ascontiguousarray(table[name], dtype=np.int32))
+    fcurve.update()
+
+
+# Writes sampled values over the frame span of a bone channel's F-Curve, creating the curve if needed.
+def write_sampled_bone_fcurve(action, bone_name, channel, array_index, frames, values):
+    fcurve = find_bone_fcurve(action, bone_name, channel, array_index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(f"pose.bones[\"{bone_name}\"].{channel}", index=array_index, action_group=bone_name)
+        invalidate_action_fcurve_index(action)
+    count_operator_stat("keys_written", len(frames))
+    keyframe_points = fcurve.keyframe_points
+    count = len(keyframe_points)
+    new_table = sampled_keyframe_table(frames, values)
+    if count and len(frames) and keyframe_points[-1].co[0] < frames[0]:
+        # Bakes go window by window in frame order, so a window usually lands after the keys the previous ones wrote:
+        # its keys are added at the tail, with no search for the range they replace. Every attribute of the added keys
+        # is written, as added keys would otherwise take their interpolation and handle types from the preferences.
+        keyframe_points.add(len(frames))
+        table = read_keyframe_table(fcurve)
+        for name, column in new_table.items():
+            table[name][count:] = column
+        write_keyframe_table(fcurve, table)
+        return
+    if count:
+        new_table = replace_keyframe_range(read_keyframe_table(fcurve), new_table)
+    write_keyframe_table(fcurve, new_table)
+
+
+# ----------------------------- Action F-Curve Index -----------------------------
+
+
+# Maps each bone of an action to its F-Curves, parsing every data path once.
+# Curves are stored by position in action.fcurves and checked on lookup, so a stale index is detected rather than trusted.
+class ActionFCurveIndex:
+    def __init__(self, action):
+        self.fcurve_count = len(action.fcurves)
+        self.entries = []  # (data path, array index, bone name, channel) per F-Curve position
+        self.bone_positions = {}
+        for position, fcurve in enumerate(action.fcurves):
+            bone_name, channel = parse_pose_bone_data_path(fcurve.data_path)
+            self.entries.append((fcurve.data_path, fcurve.array_index, bone_name, channel))
+            if bone_name is not None:
+                self.bone_positions.setdefault(bone_name, []).append(position)
+
+    # Returns the F-Curves of the given bones (optionally one channel and array index), or None if the action changed.
+    def resolve(self, action, bone_names, channel=None, array_index=None):
+        if len(action.fcurves) != self.fcurve_count:
+            return None
+
+        fcurves = []
+        for bone_name in bone_names:
+            for position in self.bone_positions.get(bone_name, ()):
+                data_path, index, _, entry_channel = self.entries[position]
+                if channel is not None and entry_channel != channel:
+                    continue
+                if array_index is not None and index != array_index:
+                    continue
+                fcurve = action.fcurves[position]
+                if fcurve.data_path != data_path or fcurve.array_index != index:
+                    return None
+                fcurves.append(fcurve)
+        return fcurves
+
+
+# Cached indices, keyed by the action's pointer
+action_fcurve_indices = {}
+
+
+def get_action_fcurve_index(action):
+    key = action.as_pointer()
+    index = action_fcurve_indices.get(key)
+    if index is None or index.fcurve_count != len(action.fcurves):
+        index = ActionFCurveIndex(action)
+        action_fcurve_indices[key] = index
+    return index
+
+
+# Drops the cached index of an action, or of every action when none is given.
+def invalidate_action_fcurve_index(action=None):
+    if action is None:
+        action_fcurve_indices.clear()
+    else:
+        action_fcurve_indices.pop(action.as_pointer(), None)
+
+
+# Returns the F-Curves of the given bones through the cached index, rebuilding it once if the action changed.
+def find_bone_fcurves(action, bone_names, channel=None, array_index=None):
+    fcurves = get_action_fcurve_index(action).resolve(action, bone_names, channel, array_index)
+    if fcurves is None:
+        invalidate_action_fcurve_index(action)
+        fcurves = get_action_fcurve_index(action).resolve(action, bone_names, channel, array_index)
+    return fcurves
+
+
+def find_bone_fcurve(action, bone_name, channel, array_index):
+    fcurves = find_bone_fcurves(action, (bone_name,), channel, array_index)
+    return fcurves[0] if fcurves else None
+
+
+# F-Curve of a data path and array index, through the F-Curve index for pose bone paths.
+def find_action_fcurve(action, data_path, array_index):
+    bone_name, channel = parse_pose_bone_data_path(data_path)
+    if bone_name is None:
+        return action.fcurves.find(data_path, index=array_index)
+    return find_bone_fcurve(action, bone_name, channel, array_index)
+
+
+# Undo, redo and file loads swap the action data under the cached indices
+@persistent
+def clear_action_fcurve_indices(*args):
+    invalidate_action_fcurve_index()
+
+
+# ----------------------------- Action Arrays -----------------------------
+# ActionArrays and the pure Spacing, Delete, Loopify and key reduction functions over it live in vrm_action_arrays.py,
+# which needs only NumPy. read_action_arrays and write_action_arrays move curves in and out of an action in bulk.
+
+
+# Reads the given F-Curves of an action (all of them by default) into ActionArrays.
+def read_action_arrays(action, fcurves=None):
+    fcurves = list(action.fcurves if fcurves is None else fcurves)
+    curves = [(fcurve.data_path, fcurve.array_index, fcurve.group.name if fcurve.group else "") for fcurve in fcurves]
+    return ActionArrays(curves, [read_keyframe_table(fcurve) for fcurve in fcurves])
+
+
+# Writes arrays back to the action they were read from as base: only the curves whose keys differ from base are
+# rewritten, curves new to arrays are created and the curves of base missing from arrays are removed.
+# Returns the number of curves written.
+def write_action_arrays(action, arrays, base):
+    removed = [curve for curve in base.positions if curve not in arrays.positions]
+    changed = []
+    for position, curve in enumerate(arrays.curves):
+        base_position = base.positions.get(curve[:2])
+        if base_position is not None:
+            base_table = base.table(base_position)
+            if all(np.array_equal(base_table[name], values) for name, values in arrays.table(position).items()):
+                continue
+        changed.append(position)
+
+    # Every curve is looked up before any is removed or created, so the F-Curve index is only built once
+    needed = removed + [arrays.curves[position][:2] for position in changed]
+    fcurves = {curve: find_action_fcurve(action, *curve) for curve in needed}
+
+    for curve in removed:
+        if fcurves[curve] is not None:
+            action.fcurves.remove(fcurves[curve])
+    count_operator_stat("fcurves_removed", len(removed))
+
+    created = False
+    for position in changed:
+        data_path, array_index, group = arrays.curves[position]
+        fcurve = fcurves[(data_path, array_index)]
+        if fcurve is None:
+            fcurve = action.fcurves.new(data_path, index=array_index, action_group=group)
+            created = True
+        write_keyframe_table(fcurve, arrays.table(position))
+    written = len(changed)
+
+    if removed or created:
+        invalidate_action_fcurve_index(action)
+    return written
+
+
+# Applies spacing offsets, a dict of (bone name, axis index) -> list of radian deltas, with space_action_arrays over
+# the curves of the bones involved. The armature's current action is adjusted unless another action is given.
+# Returns the number of keys changed.
+def apply_spacing_offsets(armature, offsets, action=None):
+    if action is None:
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            return 0
+        action = anim_data.action
+    frame_start = int(action.frame_range[0])
+    frame_end = int(action.frame_range[1])
+
+    pose_bones = [armature.pose.bones[bone_name] for bone_name in {bone_name for bone_name, _ in offsets} if bone_name in armature.pose.bones]
+    base = read_action_arrays(action, find_bone_fcurves(action, [pose_bone.name for pose_bone in pose_bones]))
+    spaced, changed = space_action_arrays(
+        base, offsets, {pose_bone.name: pose_bone.rotation_mode for pose_bone in pose_bones}, frame_start, frame_end,
+        {pose_bone.name: tuple(pose_bone.rotation_quaternion) for pose_bone in pose_bones}
+    )
+    write_action_arrays(action, spaced, base)
+    count_operator_stat("keys_modified", changed)
+
+    # Refresh the pose, since no frame change happened to re-evaluate the action
+    armature.update_tag(refresh={'TIME'})
+    return changed
+
+# Bone pair spacing function, working on the F-Curve key arrays directly instead of stepping through frames
+def adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, axis):
+    if not affect_left and not affect_right:
+        return {'CANCELLED'}
+
+    space_rad = math.radians(space_value)
+    axis_index = spacing_axis_indices.get(axis, 0)
+
+    # The left bone is spaced outwards and the right bone mirrored
+    offsets = {}
+    if affect_left:
+        offsets[(bone_l_name, axis_index)] = [space_rad]
+    if affect_right and bone_r_name:
+        offsets[(bone_r_name, axis_index)] = [-space_rad]
+
+    apply_spacing_offsets(armature, offsets)
+    return {'FINISHED'}
+
+# Update the operator to include the axis parameter
+class SpacingAdjusterOperator(bpy.types.Operator):
+    bl_idname = "object.adjust_spacing"
+    bl_label = "Adjust Spacing"
+    bl_description = "Adjusts the spacing of the selected bones according to the value chosen above."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+        bone_pair_key = context.scene.selected_bone_pair
+        space_value = context.scene.space_value_prop
+        affect_left = context.scene.affect_left_prop
+        affect_right = context.scene.affect_right_prop
+        spacing_axis = context.scene.spacing_axis
+
+        if not affect_left and not affect_right:
+            self.report({'WARNING'}, "You must select at least one bone (Left or Right) to adjust.")
+            return {'CANCELLED'}
+
+        bone_pair = next((bp for bp in bone_pairs if bp[0] == bone_pair_key), None)
+        if bone_pair:
+            bone_l_name, bone_r_name = bone_pair[1], bone_pair[2]
+            if bone_r_name is None:
+                affect_right = False  # Ensure right bone isn't processed if None
+            if context.scene.spacing_mode == 'LAYER':
+                # The layer holds the pair's total spacing, so this sets it rather than adding to it
+                if armature.animation_data is None or armature.animation_data.action is None:
+                    self.report({'ERROR'}, "No animation data found.")
+                    return {'CANCELLED'}
+                with operator_phase("spacing"):
+                    set_spacing_layer_offsets(armature, pair_spacing_layer_offsets(context.scene))
+                return {'FINISHED'}
+            with operator_phase("spacing"):
+                result = adjust_bone_pair_spacing(armature, bone_l_name, bone_r_name, space_value, affect_left, affect_right, spacing_axis)
+            if result != {'FINISHED'}:
+                return result
+        else:
+            self.report({'ERROR'}, "Invalid bone pair selected.")
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+# ----------------------------- Spacing Layer -----------------------------
+# In the Spacing Layer mode the offsets aren't written into the clip's keys: each spaced bone axis gets one constant
+# key (four quaternion keys per quaternion bone) in a small layer action, played by an NLA strip under the clip, and the clip's action is combined on top of it.
+# Changing a spacing value rewrites one key per bone instead of every key of the clip, and Apply Spacing Layer
+# flattens the layer into the clip with the same bulk key write as the destructive mode.
+
+spacing_layer_track_name = "VRM Spacing"
+
+# Custom property of the layer action keeping the clip's blend type from before the layer was added
+spacing_layer_blend_key = "vrm_spacing_action_blend_type"
+
+# Set while the spacing slider is synced from the layer, so the sync doesn't write the layer back
+spacing_layer_syncing = False
+
+
+def get_spacing_layer(armature):
+    anim_data = armature.animation_data
+    if anim_data is None:
+        return None
+    track = anim_data.nla_tracks.get(spacing_layer_track_name)
+    if track is None or not track.strips:
+        return None
+    return track.strips[0].action
+
+
+def ensure_spacing_layer(armature):
+    layer = get_spacing_layer(armature)
+    if layer is not None:
+        return layer
+
+    anim_data = armature.animation_data
+    layer = bpy.data.actions.new(f"{armature.name} Spacing")
+    layer[spacing_layer_blend_key] = anim_data.action_blend_type
+    track = anim_data.nla_tracks.new()
+    track.name = spacing_layer_track_name
+    strip = track.strips.new(layer.name, int(anim_data.action.frame_range[0]), layer)
+    # The layer's keys are constant, so holding them covers the whole clip
+    strip.extrapolation = 'HOLD'
+    # Combine adds the clip's Euler rotations to the layer's and multiplies its quaternions onto the layer's,
+    # leaving every channel the layer doesn't key as it was
+    anim_data.action_blend_type = 'COMBINE'
+    return layer
+
+
+# Offsets held by the layer, as (bone name, axis index) -> radians.
+def read_spacing_layer_offsets(armature):
+    layer = get_spacing_layer(armature)
+    offsets = {}
+    if layer is None:
+        return offsets
+    for fcurve in layer.fcurves:
+        bone_name, channel = parse_pose_bone_data_path(fcurve.data_path)
+        if channel == "rotation_euler" and len(fcurve.keyframe_points):
+            offsets[(bone_name, fcurve.array_index)] = fcurve.keyframe_points[0].co[1]
+    return offsets
+
+
+def set_spacing_layer_key(layer, bone_name, channel, array_index, frame, value):
+    fcurve = find_bone_fcurve(layer, bone_name, channel, array_index)
+    if fcurve is None:
+        fcurve = layer.fcurves.new(f"pose.bones[\"{bone_name}\"].{channel}", index=array_index, action_group=bone_name)
+        fcurve.keyframe_points.add(1)
+    point = fcurve.keyframe_points[0]
+    point.co = point.handle_left = point.handle_right = (frame, value)
+    fcurve.update()
+    count_operator_stat("keys_written")
+
+
+# Sets layer offsets, a dict of (bone name, axis index) -> radians, rewriting one key per bone axis.
+# The offsets are kept as Euler angles; quaternion bones also get the matching rotation_quaternion keys, which are the
+# ones Blender combines for them.
+def set_spacing_layer_offsets(armature, offsets):
+    layer = ensure_spacing_layer(armature)
+    frame = float(armature.animation_data.action.frame_range[0])
+    quaternion_bones = set()
+    for (bone_name, axis_index), value in offsets.items():
+        if bone_name not in armature.pose.bones:
+            continue
+        set_spacing_layer_key(layer, bone_name, "rotation_euler", axis_index, frame, value)
+        if armature.pose.bones[bone_name].rotation_mode == 'QUATERNION':
+            quaternion_bones.add(bone_name)
+
+    if quaternion_bones:
+        layer_offsets = read_spacing_layer_offsets(armature)
+        for bone_name in quaternion_bones:
+            quaternion = spacing_quaternion([layer_offsets.get((bone_name, axis_index), 0.0) for axis_index in range(3)])
+            for component in range(4):
+                set_spacing_layer_key(layer, bone_name, "rotation_quaternion", component, frame, quaternion[component])
+
+    # Refresh the pose, since no frame change happened to re-evaluate the action
+    armature.update_tag(refresh={'TIME'})
+
+
+# Adds spacing offsets, a dict of (bone name, axis index) -> list of radian deltas, to the layer's offsets.
+def add_spacing_layer_offsets(armature, offsets):
+    current = read_spacing_layer_offsets(armature)
+    totals = {}
+    for key, deltas in offsets.items():
+        total = current.get(key, 0.0)
+        for delta in deltas:
+            total += delta
+        totals[key] = total
+    set_spacing_layer_offsets(armature, totals)
+
+
+# Layer offsets of the scene's selected bone pair for the spacing slider's value.
+def pair_spacing_layer_offsets(scene):
+    bone_pair = next((bp for bp in bone_pairs if bp[0] == scene.selected_bone_pair), None)
+    if bone_pair is None:
+        return {}
+    space_rad = math.radians(scene.space_value_prop)
+    axis_index = spacing_axis_indices.get(scene.spacing_axis, 0)
+    offsets = {}
+    if scene.affect_left_prop:
+        offsets[(bone_pair[1], axis_index)] = space_rad
+    if scene.affect_right_prop and bone_pair[2]:
+        offsets[(bone_pair[2], axis_index)] = -space_rad
+    return offsets
+
+
+def remove_spacing_layer(armature):
+    anim_data = armature.animation_data
+    layer = get_spacing_layer(armature)
+    if layer is None:
+        return
+    anim_data.action_blend_type = layer.get(spacing_layer_blend_key, 'REPLACE')
+    anim_data.nla_tracks.remove(anim_data.nla_tracks[spacing_layer_track_name])
+    invalidate_action_fcurve_index(layer)
+    bpy.data.actions.remove(layer)
+    armature.update_tag(refresh={'TIME'})
+
+
+# Writes the layer's offsets into the clip's keys in one bulk pass per curve and removes the layer.
+# Returns the number of keys changed.
+def flatten_spacing_layer(armature):
+    offsets = {key: [value] for key, value in read_spacing_layer_offsets(armature).items() if value != 0.0}
+    changed = apply_spacing_offsets(armature, offsets)
+    remove_spacing_layer(armature)
+    return changed
+
+
+def get_layer_armature(context):
+    armature = context.object
+    if armature is None or armature.type != 'ARMATURE':
+        return None
+    anim_data = armature.animation_data
+    if anim_data is None or anim_data.action is None:
+        return None
+    return armature
+
+
+# Moving the spacing slider in the Spacing Layer mode updates the selected pair's layer offsets live.
+def update_spacing_layer_value(self, context):
+    if self.spacing_mode != 'LAYER' or spacing_layer_syncing:
+        return
+    armature = get_layer_armature(context)
+    if armature is not None:
+        set_spacing_layer_offsets(armature, pair_spacing_layer_offsets(self))
+
+
+# Picking another pair or axis in the Spacing Layer mode shows that pair's layer offset on the slider.
+def sync_spacing_layer_value(self, context):
+    global spacing_layer_syncing
+    if self.spacing_mode != 'LAYER':
+        return
+    armature = get_layer_armature(context)
+    bone_pair = next((bp for bp in bone_pairs if bp[0] == self.selected_bone_pair), None)
+    if armature is None or bone_pair is None:
+        return
+    offsets = read_spacing_layer_offsets(armature)
+    axis_index = spacing_axis_indices.get(self.spacing_axis, 0)
+    if (bone_pair[1], axis_index) in offsets:
+        value = math.degrees(offsets[(bone_pair[1], axis_index)])
+    elif (bone_pair[2], axis_index) in offsets:
+        value = -math.degrees(offsets[(bone_pair[2], axis_index)])
+    else:
+        value = 0.0
+    spacing_layer_syncing = True
+    try:
+        self.space_value_prop = value
+    finally:
+        spacing_layer_syncing = False
+
+
+class ApplySpacingLayerOperator(bpy.types.Operator):
+    bl_idname = "object.apply_spacing_layer"
+    bl_label = "Apply Spacing Layer"
+    bl_description = "Writes the spacing layer's offsets into the animation's keys and removes the layer. Do this before exporting, or before baking every bone."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = get_layer_armature(context)
+        if armature is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+        if get_spacing_layer(armature) is None:
+            self.report({'WARNING'}, "The animation has no spacing layer.")
+            return {'CANCELLED'}
+
+        with operator_phase("flatten"):
+            changed = flatten_spacing_layer(armature)
+        self.report({'INFO'}, f"Spacing layer applied to {changed} keys.")
+        return {'FINISHED'}
+
+
+class RemoveSpacingLayerOperator(bpy.types.Operator):
+    bl_idname = "object.remove_spacing_layer"
+    bl_label = "Remove Spacing Layer"
+    bl_description = "Removes the spacing layer without applying it, bringing back the animation's original spacing."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+        if armature is None or get_spacing_layer(armature) is None:
+            self.report({'WARNING'}, "The animation has no spacing layer.")
+            return {'CANCELLED'}
+
+        remove_spacing_layer(armature)
+        sync_spacing_layer_value(context.scene, context)
+        return {'FINISHED'}
+
+# ----------------------------- Loopify Helpers -----------------------------
+
+
+# Custom property of the action listing the seam frames the last Loopify left, which later stages must not touch
+loopify_seam_frames_key = "vrm_loopify_seam_frames"
+
+
+# Copy frame, delete range and paste frame of a Loopify over start_frame..end_frame, from the scene's Loopify settings.
+def loopify_frames(scene, start_frame, end_frame):
+    frame_selection = scene.frame_selection
+    frame_easing = scene.loopify_frame_easing
+
+    if frame_selection == 'CUSTOM_FRAMES':
+        # Ease towards the paste frame from the side the copy frame comes from, like the first and last frame modes
+        copy_frame = scene.loopify_copy_frame
+        paste_frame = scene.loopify_paste_frame
+        if paste_frame < copy_frame:
+            delete_range_start = paste_frame + 1
+            delete_range_end = paste_frame + frame_easing
+        else:
+            delete_range_start = paste_frame - frame_easing
+            delete_range_end = paste_frame - 1
+    elif frame_selection == 'LAST_FRAME':
+        copy_frame = end_frame
+        delete_range_start = start_frame
+        delete_range_end = start_frame + frame_easing - 1
+        paste_frame = 0
+    else:  # 'FIRST_FRAME'
+        copy_frame = start_frame
+        delete_range_start = end_frame - frame_easing + 1
+        delete_range_end = end_frame
+        paste_frame = end_frame + 1
+    return copy_frame, delete_range_start, delete_range_end, paste_frame
+
+
+# Loopifies the F-Curves of an action with the scene's seam mode through loopify_action_arrays, reading and writing
+# the curves in bulk around it. map_function is passed on, so callers can spread the NumPy rewrites over threads.
+# Returns the number of keys removed (or blended, for a crossfade) and inserted.
+def loopify_action(scene, action, fcurves, copy_frame, delete_range_start, delete_range_end, paste_frame, map_function=map):
+    crossfade = scene.loopify_seam_mode == 'CROSSFADE'
+    base = read_action_arrays(action, fcurves)
+    with operator_phase("crossfade" if crossfade else "rewrite"):
+        looped, keys_changed, keys_inserted, seam_frames = loopify_action_arrays(
+            base, copy_frame, delete_range_start, delete_range_end, paste_frame,
+            scene.loopify_seam_mode, scene.loopify_frame_easing, scene.loopify_blend_curve, map_function
+        )
+        write_action_arrays(action, looped, base)
+    count_operator_stat("keys_modified" if crossfade else "keys_removed", keys_changed)
+    count_operator_stat("keys_inserted", keys_inserted)
+
+    # Remember the seam so key reduction keeps the pasted key and the keys bordering the cleared or blended range
+    action[loopify_seam_frames_key] = seam_frames
+    return keys_changed, keys_inserted
+
+
+# ----------------------------- Loop Point Search Helpers -----------------------------
+
+# How much velocity differences weigh against pose differences when comparing frames, in frames squared
+loop_search_velocity_weight = 4.0
+
+
+# Samples the bones' curves at the frames into a float32 frames x channels array. Baked curves have a key on every frame,
+# so their keys are read in bulk and interpolated linearly rather than evaluated frame by frame.
+# Quaternions are kept in one hemisphere so q and -q don't read as different poses.
+def sample_loop_features(action, bone_names, frames):
+    columns = []
+    for bone_name in bone_names:
+        quaternion = {}
+        for fcurve in find_bone_fcurves(action, (bone_name,)):
+            count = len(fcurve.keyframe_points)
+            if count == 0:
+                continue
+            co = np.empty(count * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get("co", co)
+            values = np.interp(frames, co[0::2], co[1::2])
+            _, channel = parse_pose_bone_data_path(fcurve.data_path)
+            if channel == "rotation_quaternion":
+                quaternion[fcurve.array_index] = values
+            else:
+                columns.append(values)
+        if len(quaternion) == 4:
+            columns.extend(make_quaternions_continuous(np.stack([quaternion[index] for index in range(4)], axis=1)).T)
+        else:
+            columns.extend(quaternion.values())
+    if not columns:
+        return np.zeros((len(frames), 0), dtype=np.float32)
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+# Squared distances between every row of a and every row of b.
+def squared_distance_matrix(a, b):
+    distances = np.sum(a * a, axis=1)[:, None] + np.sum(b * b, axis=1)[None, :] - 2.0 * (a @ b.T)
+    return np.maximum(distances, 0.0)
+
+
+# Finds the loop with the smallest seam: an early frame a and a late frame b, each within window frames of the clip's
+# ends, whose poses and velocities match best, so that playing a after b - 1 continues the motion like b would.
+# Then picks the easing: the fewest frames to re-interpolate so the bridge's velocity differs from the motion on
+# either side by no more than the clip's typical frame-to-frame change in velocity.
+# ease_after_paste puts the easing after the paste frame (Loopify's Last Frame mode) instead of before it.
+# Returns (a, b, easing, seam_error) as indices into features, or None when the clip is too short.
+def find_loop_point(features, window, ease_after_paste=True):
+    count = len(features)
+    window = min(window, (count - 2) // 3)
+    if window < 1:
+        return None
+    velocities = np.gradient(features, axis=0)
+    early = slice(0, window)
+    late = slice(count - window, count)
+
+    # Seam error of every (a, b) pair, comparing poses and velocities scaled per channel
+    distances = squared_distance_matrix(features[early], features[late])
+    distances += loop_search_velocity_weight * squared_distance_matrix(velocities[early], velocities[late])
+    distances /= max(1, features.shape[1])
+    a, b = np.unravel_index(int(np.argmin(distances)), distances.shape)
+    a, b = int(a), int(b) + count - window
+    seam_error = float(np.sqrt(distances[a, b - count + window]))
+
+    # Easing candidates keep at least half the loop, measured from the frame that's pasted over
+    max_easing = max(1, min(window, (b - a) // 2 - 1))
+    easings = np.arange(1, max_easing + 1)
+    if ease_after_paste:
+        # b's pose is pasted at a, then the keys up to a + easing are re-interpolated into a + easing + 1
+        bridge_start = np.full(len(easings), b)
+        bridge_end = a + easings + 1
+    else:
+        # a's pose is pasted at b, and the keys from b - easing are re-interpolated from b - easing - 1
+        bridge_start = b - easings - 1
+        bridge_end = np.full(len(easings), a)
+    bridge_velocity = (features[bridge_end] - features[bridge_start]) / (easings + 1)[:, None]
+    mismatch = np.maximum(
+        np.linalg.norm(bridge_velocity - velocities[bridge_start], axis=1),
+        np.linalg.norm(bridge_velocity - velocities[bridge_end], axis=1)
+    )
+    typical_change = np.median(np.linalg.norm(np.diff(velocities, axis=0), axis=1)) if count > 2 else 0.0
+    smooth = np.nonzero(mismatch <= typical_change)[0]
+    easing = int(easings[smooth[0]] if len(smooth) else easings[int(np.argmin(mismatch))])
+    return a, b, easing, seam_error
+
+
+# ----------------------------- Spacing Profiles -----------------------------
+
+# One bone pair adjustment inside a spacing profile
+class SpacingProfileEntry(bpy.types.PropertyGroup):
+    bone_pair: bpy.props.EnumProperty(
+        name="Bone Pair",
+        description="Bone pair this entry adjusts",
+        items=[(bp[0], bp[3], "") for bp in bone_pairs],
+        default='SHOULDER'
+    )
+    space_value: bpy.props.FloatProperty(
+        name="Spacing Value",
+        description="Spacing value in degrees",
+        default=5.0,
+        min=-20.0,
+        max=20.0
+    )
+    axis: bpy.props.EnumProperty(
+        name="Spacing Axis",
+        description="Axis this entry applies the spacing on",
+        items=spacing_axis_items,
+        default='SIDEWAYS'
+    )
+    affect_left: bpy.props.BoolProperty(name="Affect Left", default=True)
+    affect_right: bpy.props.BoolProperty(name="Affect Right", default=True)
+
+
+# A named list of spacing entries, applied together in a single pass
+class SpacingProfile(bpy.types.PropertyGroup):
+    entries: bpy.props.CollectionProperty(type=SpacingProfileEntry)
+
+
+# Keys written to and read from JSON spacing presets
+spacing_profile_entry_keys = ("bone_pair", "space_value", "axis", "affect_left", "affect_right")
+
+
+# Turns the entries of a profile into the (bone name, axis index) -> deltas dict used by apply_spacing_offsets
+def collect_spacing_offsets(entries):
+    offsets = {}
+    for entry in entries:
+        bone_pair = next((bp for bp in bone_pairs if bp[0] == entry.bone_pair), None)
+        if bone_pair is None:
+            continue
+        space_rad = math.radians(entry.space_value)
+        axis_index = spacing_axis_indices.get(entry.axis, 0)
+        if entry.affect_left:
+            offsets.setdefault((bone_pair[1], axis_index), []).append(space_rad)
+        if entry.affect_right and bone_pair[2]:
+            offsets.setdefault((bone_pair[2], axis_index), []).append(-space_rad)
+    return offsets
+
+
+def get_active_spacing_profile(scene):
+    index = scene.active_spacing_profile_index
+    if 0 <= index < len(scene.spacing_profiles):
+        return scene.spacing_profiles[index]
+    return None
+
+
+class AddSpacingProfileOperator(bpy.types.Operator):
+    bl_idname = "object.add_spacing_profile"
+    bl_label = "Add Spacing Profile"
+    bl_description = "Creates a new, empty spacing profile."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        scene = context.scene
+        profile = scene.spacing_profiles.add()
+        profile.name = f"Profile {len(scene.spacing_profiles)}"
+        scene.active_spacing_profile_index = len(scene.spacing_profiles) - 1
+        return {'FINISHED'}
+
+
+class RemoveSpacingProfileOperator(bpy.types.Operator):
+    bl_idname = "object.remove_spacing_profile"
+    bl_label = "Remove Spacing Profile"
+    bl_description = "Removes the active spacing profile."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        scene = context.scene
+        if get_active_spacing_profile(scene) is None:
+            self.report({'WARNING'}, "No spacing profile selected.")
+            return {'CANCELLED'}
+
+        scene.spacing_profiles.remove(scene.active_spacing_profile_index)
+        scene.active_spacing_profile_index = max(0, min(scene.active_spacing_profile_index, len(scene.spacing_profiles) - 1))
+        return {'FINISHED'}
+
+
+class AddSpacingProfileEntryOperator(bpy.types.Operator):
+    bl_idname = "object.add_spacing_profile_entry"
+    bl_label = "Add Current Spacing to Profile"
+    bl_description = "Adds the bone pair, value, axis and sides chosen above as an entry of the active spacing profile."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        scene = context.scene
+        profile = get_active_spacing_profile(scene)
+        if profile is None:
+            self.report({'WARNING'}, "No spacing profile selected.")
+            return {'CANCELLED'}
+
+        entry = profile.entries.add()
+        entry.bone_pair = scene.selected_bone_pair
+        entry.space_value = scene.space_value_prop
+        entry.axis = scene.spacing_axis
+        entry.affect_left = scene.affect_left_prop
+        entry.affect_right = scene.affect_right_prop
+        return {'FINISHED'}
+
+
+class RemoveSpacingProfileEntryOperator(bpy.types.Operator):
+    bl_idname = "object.remove_spacing_profile_entry"
+    bl_label = "Remove Spacing Profile Entry"
+    bl_description = "Removes an entry from the active spacing profile."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    index: bpy.props.IntProperty()
+
+    @instrumented_execute
+    def execute(self, context):
+        profile = get_active_spacing_profile(context.scene)
+        if profile is None or not 0 <= self.index < len(profile.entries):
+            return {'CANCELLED'}
+
+        profile.entries.remove(self.index)
+        return {'FINISHED'}
+
+
+class ApplySpacingProfileOperator(bpy.types.Operator):
+    bl_idname = "object.apply_spacing_profile"
+    bl_label = "Apply Spacing Profile"
+    bl_description = "Applies every entry of the active spacing profile to the current animation in a single pass, as one undo step."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+        profile = get_active_spacing_profile(context.scene)
+        if profile is None or not profile.entries:
+            self.report({'WARNING'}, "The active spacing profile has no entries.")
+            return {'CANCELLED'}
+
+        if armature is None or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "Select the VRM armature first.")
+            return {'CANCELLED'}
+
+        if armature.animation_data is None or armature.animation_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        if context.scene.spacing_mode == 'LAYER':
+            with operator_phase("spacing"):
+                add_spacing_layer_offsets(armature, collect_spacing_offsets(profile.entries))
+            sync_spacing_layer_value(context.scene, context)
+            self.report({'INFO'}, f"Spacing profile '{profile.name}' added to the spacing layer.")
+            return {'FINISHED'}
+
+        with operator_phase("spacing"):
+            changed = apply_spacing_offsets(armature, collect_spacing_offsets(profile.entries))
+        self.report({'INFO'}, f"Spacing profile '{profile.name}' applied to {changed} keys.")
+        return {'FINISHED'}
+
+
+class ExportSpacingProfileOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_spacing_profile"
+    bl_label = "Export Spacing Profile"
+    bl_description = "Saves the active spacing profile as a JSON preset, to reuse it on other clips and .blend files."
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+
+    @instrumented_execute
+    def execute(self, context):
+        profile = get_active_spacing_profile(context.scene)
+        if profile is None:
+            self.report({'WARNING'}, "No spacing profile selected.")
+            return {'CANCELLED'}
+
+        preset = {
+            "name": profile.name,
+            "entries": [{key: getattr(entry, key) for key in spacing_profile_entry_keys} for entry in profile.entries]
+        }
+        with open(self.filepath, "w", encoding="utf-8") as preset_file:
+            json.dump(preset, preset_file, indent=4)
+
+        self.report({'INFO'}, f"Spacing profile saved to {self.filepath}.")
+        return {'FINISHED'}
+
+
+class ImportSpacingProfileOperator(bpy.types.Operator, ImportHelper):
+    bl_idname = "object.import_spacing_profile"
+    bl_label = "Import Spacing Profile"
+    bl_description = "Loads a JSON spacing preset as a new spacing profile."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+
+    @instrumented_execute
+    def execute(self, context):
+        try:
+            with open(self.filepath, encoding="utf-8") as preset_file:
+                preset = json.load(preset_file)
+        except (OSError, ValueError) as error:
+            self.report({'ERROR'}, f"Could not read spacing preset: {error}")
+            return {'CANCELLED'}
+
+        scene = context.scene
+        profile = scene.spacing_profiles.add()
+        profile.name = preset.get("name", bpy.path.display_name_from_filepath(self.filepath))
+        for entry_data in preset.get("entries", []):
+            entry = profile.entries.add()
+            for key in spacing_profile_entry_keys:
+                if key in entry_data:
+                    try:
+                        setattr(entry, key, entry_data[key])
+                    except (TypeError, ValueError):
+                        self.report({'WARNING'}, f"Ignoring invalid {key} value: {entry_data[key]}")
+
+        scene.active_spacing_profile_index = len(scene.spacing_profiles) - 1
+        self.report({'INFO'}, f"Spacing profile '{profile.name}' loaded with {len(profile.entries)} entries.")
+        return {'FINISHED'}
+
+# ----------------------------- Spring Bone Simulation -----------------------------
+# A NumPy take on the VRM 1.0 spring bone (VRMC_springBone) Verlet integration, used by the Spring Simulation bake engine.
+# Every chain is simulated at once, one joint depth at a time, over parent transforms sampled straight from the action.
+# Bone constraints, drivers and spring centers are not evaluated, so results differ slightly from a visual keying bake.
+
+
+# Samples one bone channel over the frames, falling back to the pose bone's current value where a component isn't keyed.
+# Curves are evaluated from their key tables in NumPy; only curves with modifiers or linear extrapolation, which the
+# tables don't model, are evaluated frame by frame by Blender.
+def sample_bone_channel(action, pose_bone, channel, frames):
+    current = np.array(getattr(pose_bone, channel), dtype=np.float64)
+    values = np.tile(current, (len(frames), 1))
+    for fcurve in find_bone_fcurves(action, (pose_bone.name,), channel):
+        if fcurve.array_index >= values.shape[1]:
+            continue
+        if len(fcurve.modifiers) or fcurve.extrapolation != 'CONSTANT':
+            values[:, fcurve.array_index] = [fcurve.evaluate(frame) for frame in frames]
+        else:
+            values[:, fcurve.array_index] = evaluate_keyframe_table(read_keyframe_table(fcurve), frames)
+    return values
+
+
+# Armature-space matrices of a pose bone's local basis over the frames, read from the action's curves.
+def sample_basis_matrices(action, pose_bone, frames):
+    location = sample_bone_channel(action, pose_bone, "location", frames)
+    scale = sample_bone_channel(action, pose_bone, "scale", frames)
+    if pose_bone.rotation_mode == 'QUATERNION':
+        rotation = quaternion_to_matrix(sample_bone_channel(action, pose_bone, "rotation_quaternion", frames))
+    elif pose_bone.rotation_mode == 'AXIS_ANGLE':
+        rotation = axis_angle_to_matrix(sample_bone_channel(action, pose_bone, "rotation_axis_angle", frames))
+    else:
+        rotation = euler_to_matrix(sample_bone_channel(action, pose_bone, "rotation_euler", frames), pose_bone.rotation_mode)
+    return compose_matrices(location, rotation, scale)
+
+
+# Rest matrix of a bone relative to its parent (or to the armature for root bones).
+def rest_relative_matrix(bone):
+    matrix = np.array(bone.matrix_local, dtype=np.float64)
+    if bone.parent is None:
+        return matrix
+    return np.linalg.inv(np.array(bone.parent.matrix_local, dtype=np.float64)) @ matrix
+
+
+# Forward kinematics over the frames for the requested bones and their ancestors, returning name -> (frames, 4, 4).
+# Bones listed in rest_bones keep an unrotated basis, which is how simulated spring joints start out.
+def sample_pose_matrices(armature, action, bone_names, frames, rest_bones=()):
+    matrices = {}
+
+    def evaluate(bone):
+        if bone.name in matrices:
+            return matrices[bone.name]
+        local = rest_relative_matrix(bone)
+        if bone.name in rest_bones:
+            chain = np.broadcast_to(local, (len(frames), 4, 4))
+        else:
+            chain = local @ sample_basis_matrices(action, armature.pose.bones[bone.name], frames)
+        if bone.parent is not None:
+            chain = evaluate(bone.parent) @ chain
+        matrices[bone.name] = chain
+        return chain
+
+    for bone_name in bone_names:
+        evaluate(armature.data.bones[bone_name])
+    return matrices
+
+
+# The armature's VRM 1.0 spring bone settings, or None when the VRM add-on isn't installed.
+def get_spring_bone_settings(armature):
+    try:
+        return armature.data.vrm_addon_extension.spring_bone1
+    except AttributeError:
+        return None
+
+
+# Reads the chains of the VRM add-on's spring_bone1 settings as lists of joints, root to tip, with their collider names.
+# Which joints make up each chain comes from the spring chain index; their parameters are read fresh. Without the VRM
+# add-on there are none.
+def collect_spring_chains(armature):
+    spring_bone1 = get_spring_bone_settings(armature)
+    if spring_bone1 is None:
+        return [], []
+    bones = armature.data.bones
+    index = get_spring_chain_index(armature)
+
+    colliders = {}
+    for collider in spring_bone1.colliders:
+        if collider.node.bone_name in bones:
+            colliders[collider.uuid] = collider
+    collider_groups = {group.uuid: [ref.collider_uuid for ref in group.colliders] for group in spring_bone1.collider_groups}
+
+    chains = []
+    for spring_index, joint_indices in index.springs:
+        if len(joint_indices) < 2:
+            continue
+        spring = spring_bone1.springs[spring_index]
+        joints = [spring.joints[joint_index] for joint_index in joint_indices]
+        collider_uuids = []
+        for group_ref in spring.collider_groups:
+            collider_uuids.extend(uuid for uuid in collider_groups.get(group_ref.collider_group_uuid, ()) if uuid in colliders)
+        chains.append({
+            "bones": [joint.node.bone_name for joint in joints],
+            "stiffness": [joint.stiffness for joint in joints],
+            "drag_force": [joint.drag_force for joint in joints],
+            "gravity_power": [joint.gravity_power for joint in joints],
+            "gravity_dir": [tuple(joint.gravity_dir) for joint in joints],
+            "hit_radius": [joint.hit_radius for joint in joints],
+            "colliders": sorted(set(collider_uuids))
+        })
+
+    collider_data = []
+    for uuid, collider in colliders.items():
+        capsule = collider.shape_type == 'Capsule'
+        shape = collider.shape.capsule if capsule else collider.shape.sphere
+        collider_data.append({
+            "uuid": uuid,
+            "bone": collider.node.bone_name,
+            "offset": tuple(shape.offset),
+            "tail": tuple(shape.tail) if capsule else tuple(shape.offset),
+            "radius": shape.radius
+        })
+    return chains, collider_data
+
+
+# Packs chains into padded (chains, joints, ...) arrays for the simulation.
+def pack_spring_chains(armature, chains, colliders, gravity_matrix):
+    bones = armature.data.bones
+    count = len(chains)
+    depth = max(len(chain["bones"]) for chain in chains)
+    collider_index = {collider["uuid"]: index for index, collider in enumerate(colliders)}
+
+    packed = {
+        "depth": np.array([len(chain["bones"]) - 1 for chain in chains]),
+        "rest": np.tile(np.eye(4), (count, depth, 1, 1)),
+        "axis": np.zeros((count, depth, 3)),
+        "length": np.zeros((count, depth)),
+        "stiffness": np.zeros((count, depth)),
+        "drag_force": np.zeros((count, depth)),
+        "gravity": np.zeros((count, depth, 3)),
+        "hit_radius": np.zeros((count, depth)),
+        "collider_mask": np.zeros((count, len(colliders)), dtype=bool)
+    }
+    for c, chain in enumerate(chains):
+        for j in range(len(chain["bones"]) - 1):
+            head = np.array(bones[chain["bones"][j]].matrix_local, dtype=np.float64)
+            tail = np.array(bones[chain["bones"][j + 1]].matrix_local, dtype=np.float64)
+            # Rest of the next joint in this joint's space; its translation is the bone axis the spring returns to
+            child_rest = np.linalg.inv(head) @ tail
+            packed["rest"][c, j + 1] = child_rest
+            packed["axis"][c, j] = child_rest[:3, 3]
+            packed["length"][c, j] = np.linalg.norm(child_rest[:3, 3])
+            packed["stiffness"][c, j] = chain["stiffness"][j]
+            packed["drag_force"][c, j] = chain["drag_force"][j]
+            packed["gravity"][c, j] = gravity_matrix @ np.array(chain["gravity_dir"][j]) * chain["gravity_power"][j]
+            packed["hit_radius"][c, j] = chain["hit_radius"][j]
+        for uuid in chain["colliders"]:
+            packed["collider_mask"][c, collider_index[uuid]] = True
+    return packed
+
+
+# Pushes tails out of sphere or capsule colliders, then back onto the bone length around the head.
+def resolve_spring_collisions(tails, heads, lengths, hit_radius, collider_mask, starts, ends, radii):
+    for c in np.nonzero(np.any(collider_mask, axis=0))[0]:
+        segment = ends[c] - starts[c]
+        segment_length = float(np.dot(segment, segment))
+        if segment_length > 0.0:
+            t = np.clip((tails - starts[c]) @ segment / segment_length, 0.0, 1.0)
+            closest = starts[c] + t[:, None] * segment
+        else:
+            closest = np.broadcast_to(starts[c], tails.shape)
+        offset = tails - closest
+        distance = np.linalg.norm(offset, axis=-1)
+        reach = radii[c] + hit_radius
+        hit = collider_mask[:, c] & (distance < reach)
+        if np.any(hit):
+            tails[hit] = closest[hit] + normalize_vectors(offset[hit]) * reach[hit, None]
+            tails[hit] = heads[hit] + normalize_vectors(tails[hit] - heads[hit]) * lengths[hit, None]
+    return tails
+
+
+# Runs the Verlet integration for every chain over the frames.
+# root_matrices: (frames, chains, 4, 4) armature-space matrices of each chain's first joint with an unrotated basis.
+# collider_starts/ends: (frames, colliders, 3) sphere centers or capsule segments; collider_radii: (colliders,).
+# state carries the chain tails over from a previous call, to simulate a clip a window of frames at a time.
+# Returns (frames, chains, joints, 4) local rotation quaternions for each joint that has a child, and the state to continue from.
+def simulate_spring_chains(root_matrices, packed, collider_starts, collider_ends, collider_radii, delta_time, state=None):
+    frame_count, chain_count = root_matrices.shape[:2]
+    depth = packed["rest"].shape[1]
+    levels = [np.nonzero(packed["depth"] > level)[0] for level in range(depth)]
+    axis_unit = normalize_vectors(packed["axis"])
+
+    rotations = np.zeros((frame_count, chain_count, depth, 4))
+    rotations[..., 0] = 1.0
+    initialize = state is None
+    if initialize:
+        current_tails = np.zeros((chain_count, depth, 3))
+        previous_tails = np.zeros((chain_count, depth, 3))
+    else:
+        current_tails, previous_tails = (tails.copy() for tails in state)
+    joint_matrices = np.zeros((chain_count, 4, 4))
+
+    for frame in range(frame_count):
+        for level, chains in enumerate(levels):
+            if len(chains) == 0:
+                break
+            if level == 0:
+                matrix = root_matrices[frame, chains]
+            else:
+                matrix = joint_matrices[chains] @ packed["rest"][chains, level]
+            head = matrix[:, :3, 3]
+            rotation = matrix[:, :3, :3] / np.maximum(np.linalg.norm(matrix[:, :3, :3], axis=1, keepdims=True), 1e-12)
+            axis_world = np.einsum("nij,nj->ni", rotation, axis_unit[chains, level])
+            length = packed["length"][chains, level]
+
+            if initialize and frame == 0:
+                current_tails[chains, level] = head + axis_world * length[:, None]
+                previous_tails[chains, level] = current_tails[chains, level]
+
+            current = current_tails[chains, level]
+            inertia = (current - previous_tails[chains, level]) * (1.0 - packed["drag_force"][chains, level])[:, None]
+            stiffness = axis_world * (packed["stiffness"][chains, level] * delta_time)[:, None]
+            external = packed["gravity"][chains, level] * delta_time
+            tails = current + inertia + stiffness + external
+            tails = head + normalize_vectors(tails - head) * length[:, None]
+            tails = resolve_spring_collisions(
+                tails, head, length, packed["hit_radius"][chains, level], packed["collider_mask"][chains],
+                collider_starts[frame], collider_ends[frame], collider_radii
+            )
+
+            previous_tails[chains, level] = current
+            current_tails[chains, level] = tails
+
+            local_direction = normalize_vectors(np.einsum("nji,nj->ni", rotation, tails - head))
+            quaternion = rotation_between(axis_unit[chains, level], local_direction)
+            rotations[frame, chains, level] = quaternion
+
+            rotated = np.tile(np.eye(4), (len(chains), 1, 1))
+            rotated[:, :3, :3] = quaternion_to_matrix(quaternion)
+            joint_matrices[chains] = matrix @ rotated
+
+    return rotations, (current_tails, previous_tails)
+
+
+# Keys rotations on a bone in its own rotation mode, continuing the quaternion signs and Euler angles of the previous window.
+# Returns the last quaternion and Euler keyed, to pass as previous for the next window.
+def write_rotation_keys(armature, action, bone_name, frames, quaternions, previous=(None, None)):
+    previous_quaternion, euler = previous
+    if previous_quaternion is not None:
+        quaternions = make_quaternions_continuous(np.concatenate([[previous_quaternion], quaternions]))[1:]
+    else:
+        quaternions = make_quaternions_continuous(quaternions)
+
+    rotation_mode = armature.pose.bones[bone_name].rotation_mode
+    if rotation_mode == 'QUATERNION':
+        channel, values = "rotation_quaternion", quaternions
+    elif rotation_mode == 'AXIS_ANGLE':
+        channel = "rotation_axis_angle"
+        values = np.array([(angle, *axis) for axis, angle in (mathutils.Quaternion(q).to_axis_angle() for q in quaternions)])
+    else:
+        channel = "rotation_euler"
+        values = []
+        for q in quaternions:
+            euler = mathutils.Quaternion(q).to_euler(rotation_mode, euler) if euler is not None else mathutils.Quaternion(q).to_euler(rotation_mode)
+            values.append(tuple(euler))
+        values = np.array(values)
+
+    for array_index in range(values.shape[1]):
+        write_sampled_bone_fcurve(action, bone_name, channel, array_index, frames, values[:, array_index])
+    return quaternions[-1], euler
+
+
+# Quaternion and Euler of a bone's rotation curves at a frame, like write_rotation_keys returns them, to key on after it.
+def read_rotation_key(armature, action, bone_name, frame):
+    pose_bone = armature.pose.bones[bone_name]
+    if pose_bone.rotation_mode == 'QUATERNION':
+        return sample_bone_channel(action, pose_bone, "rotation_quaternion", [frame])[0], None
+    if pose_bone.rotation_mode == 'AXIS_ANGLE':
+        angle, *axis = sample_bone_channel(action, pose_bone, "rotation_axis_angle", [frame])[0]
+        return np.array(mathutils.Quaternion(axis, angle)), None
+    euler = mathutils.Euler(sample_bone_channel(action, pose_bone, "rotation_euler", [frame])[0], pose_bone.rotation_mode)
+    return np.array(euler.to_quaternion()), euler
+
+
+# Spring bone simulation bake that can run a window of frames at a time, carrying the chain state between windows.
+class SpringBoneBake:
+    def __init__(self, scene, armature, action):
+        self.armature = armature
+        self.action = action
+        self.chains, self.colliders = collect_spring_chains(armature)
+        self.state = None
+        self.previous_rotations = {}
+        # Chain state after every bake_checkpoint_interval-th frame, to resume from in incremental re-bakes
+        self.checkpoints = {}
+        if not self.chains:
+            return
+
+        self.joint_bones = {bone_name for chain in self.chains for bone_name in chain["bones"]}
+        self.root_bones = [chain["bones"][0] for chain in self.chains]
+        self.sampled_bones = set(self.root_bones + [collider["bone"] for collider in self.colliders])
+        self.collider_radii = np.array([collider["radius"] for collider in self.colliders], dtype=np.float64)
+
+        # Gravity directions are given in world space, the simulation runs in armature space
+        gravity_matrix = np.array(armature.matrix_world.to_3x3().normalized().inverted(), dtype=np.float64)
+        self.packed = pack_spring_chains(armature, self.chains, self.colliders, gravity_matrix)
+        self.delta_time = scene.render.fps_base / scene.render.fps
+
+    # Simulates and keys frame_start..frame_end, picking up where the previous window stopped. Returns the number of joints baked.
+    def bake_window(self, frame_start, frame_end):
+        if not self.chains:
+            return 0
+        frames, inputs = self.sample_window(frame_start, frame_end)
+        return self.write_window(frames, self.simulate(inputs, frames))
+
+    # Reads the chain roots' and colliders' transforms over frame_start..frame_end from the action.
+    def sample_window(self, frame_start, frame_end):
+        frames = np.arange(frame_start, frame_end + 1, dtype=np.float64)
+        matrices = sample_pose_matrices(self.armature, self.action, self.sampled_bones, frames, rest_bones=self.joint_bones)
+
+        root_matrices = np.stack([matrices[bone_name] for bone_name in self.root_bones], axis=1)
+        collider_starts = np.zeros((len(frames), len(self.colliders), 3))
+        collider_ends = np.zeros((len(frames), len(self.colliders), 3))
+        for index, collider in enumerate(self.colliders):
+            bone_matrix = matrices[collider["bone"]]
+            collider_starts[:, index] = (bone_matrix @ np.append(collider["offset"], 1.0))[:, :3]
+            collider_ends[:, index] = (bone_matrix @ np.append(collider["tail"], 1.0))[:, :3]
+        return frames, (root_matrices, collider_starts, collider_ends)
+
+    # Runs the simulation on sampled inputs. Only NumPy is used, so bakes of different armatures can run in threads.
+    # The frames are simulated in pieces ending on the checkpoint frames, which are counted from frame 0 so that bakes
+    # starting anywhere keep their checkpoints on the same frames.
+    def simulate(self, inputs, frames):
+        root_matrices, collider_starts, collider_ends = inputs
+        ends = [f + 1 for f, frame in enumerate(frames) if (int(frame) + 1) % bake_checkpoint_interval == 0]
+        if not ends or ends[-1] != len(frames):
+            ends.append(len(frames))
+        rotations = []
+        start = 0
+        for end in ends:
+            piece, self.state = simulate_spring_chains(
+                root_matrices[start:end], self.packed, collider_starts[start:end], collider_ends[start:end],
+                self.collider_radii, self.delta_time, self.state
+            )
+            self.checkpoints[int(frames[end - 1])] = self.state
+            rotations.append(piece)
+            start = end
+        return np.concatenate(rotations)
+
+    def write_window(self, frames, rotations):
+        baked = 0
+        for c, chain in enumerate(self.chains):
+            for j, bone_name in enumerate(chain["bones"][:-1]):
+                previous = self.previous_rotations.get(bone_name, (None, None))
+                self.previous_rotations[bone_name] = write_rotation_keys(self.armature, self.action, bone_name, frames, rotations[:, c, j], previous)
+                baked += 1
+        return baked
+
+
+# Bakes the spring bones of an armature into its action over frame_start..frame_end with the NumPy simulation.
+# Returns the number of joints baked.
+def bake_spring_bones(scene, armature, action, frame_start, frame_end):
+    return SpringBoneBake(scene, armature, action).bake_window(frame_start, frame_end)
+
+
+# Visual keying bake that steps the scene a window at a time and keys the evaluated pose of the bones, like nla.bake does.
+# Frames are stepped in order across windows, so the VRM add-on's spring bones keep simulating continuously.
+class VisualPoseBake:
+    def __init__(self, scene, armature, action, bone_names):
+        self.scene = scene
+        self.armature = armature
+        self.action = action
+        self.bone_names = sorted(bone_names)
+        self.previous_rotations = {}
+
+    # Steps through and keys frame_start..frame_end. Returns the number of bones baked.
+    def bake_window(self, frame_start, frame_end):
+        self.begin_window(frame_start, frame_end)
+        for f, frame in enumerate(self.frames):
+            counted_frame_set(self.scene, int(frame))
+            self.sample(f)
+        return self.end_window()
+
+    # The window can also be stepped from outside, so one scene sweep can sample several bakes (see bake_visual_poses_together)
+    def begin_window(self, frame_start, frame_end):
+        self.frames = np.arange(frame_start, frame_end + 1, dtype=np.float64)
+        self.pose_bones = [self.armature.pose.bones[bone_name] for bone_name in self.bone_names]
+        self.locations = np.zeros((len(self.pose_bones), len(self.frames), 3))
+        self.quaternions = np.zeros((len(self.pose_bones), len(self.frames), 4))
+        self.scales = np.zeros((len(self.pose_bones), len(self.frames), 3))
+
+    # Records the evaluated pose of the bones as the window's f-th frame; the scene must be on that frame.
+    def sample(self, f):
+        for b, pose_bone in enumerate(self.pose_bones):
+            matrix = self.armature.convert_space(pose_bone=pose_bone, matrix=pose_bone.matrix, from_space='POSE', to_space='LOCAL')
+            location, rotation, scale = matrix.decompose()
+            self.locations[b, f] = location
+            self.quaternions[b, f] = rotation
+            self.scales[b, f] = scale
+
+    # Keys the window's frames from first_frame on, every frame by default.
+    def end_window(self, first_frame=None):
+        keep = slice(None) if first_frame is None else self.frames >= first_frame
+        frames = self.frames[keep]
+        for b, bone_name in enumerate(self.bone_names):
+            for array_index in range(3):
+                write_sampled_bone_fcurve(self.action, bone_name, "location", array_index, frames, self.locations[b, keep, array_index])
+                write_sampled_bone_fcurve(self.action, bone_name, "scale", array_index, frames, self.scales[b, keep, array_index])
+            previous = self.previous_rotations.get(bone_name, (None, None))
+            self.previous_rotations[bone_name] = write_rotation_keys(self.armature, self.action, bone_name, frames, self.quaternions[b][keep], previous)
+        return len(self.bone_names)
+
+
+# Bakes several visual pose bakes, given as (bake, frame_start, frame_end), in one sweep of the scene: each frame is set
+# once and every bake whose range covers it samples its armature. Returns the number of bones baked.
+def bake_visual_poses_together(scene, bakes):
+    if not bakes:
+        return 0
+    for bake, frame_start, frame_end in bakes:
+        bake.begin_window(frame_start, frame_end)
+    for frame in range(min(bake[1] for bake in bakes), max(bake[2] for bake in bakes) + 1):
+        counted_frame_set(scene, frame)
+        for bake, frame_start, frame_end in bakes:
+            if frame_start <= frame <= frame_end:
+                bake.sample(frame - frame_start)
+    return sum(bake.end_window() for bake, _, _ in bakes)
+
+
+# ----------------------------- Bake Cache -----------------------------
+# Baked physics curves are cached on disk under a hash of everything the bake depends on: the action's curves outside
+# the physics bones (spacing included), the spacing layer, the rest pose, the VRM spring bone and collider settings,
+# the bake settings and, for Visual Keying, the evaluated state it records (spring physics on or off, constraints and
+# drivers). A bake whose inputs didn't change restores its curves in bulk instead of simulating again.
+# Entries are compressed NumPy archives; the least recently used ones are evicted past the size limit.
+
+# Bumped whenever the cached data or the key changes meaning, so older entries are never restored
+bake_cache_version = 3
+
+
+def get_bake_cache_dir(scene):
+    if scene.bake_cache_dir:
+        return bpy.path.abspath(scene.bake_cache_dir)
+    return os.path.join(tempfile.gettempdir(), "vrm_bake_cache")
+
+
+# Bones whose curves the bake writes, with the scene's bake settings.
+def get_baked_bone_names(scene, armature):
+    if scene.bake_engine == 'SPRING_SIMULATION':
+        # The simulation keys every joint of the VRM chains but their tips, and nothing on rigs without spring bones
+        index = get_spring_chain_index(armature)
+        if not index.from_vrm:
+            return set()
+        return {bone_name for chain in index.chains if len(chain) >= 2 for bone_name in chain[:-1]}
+    if scene.bake_physics_only:
+        return get_physics_bone_names(armature)
+    return {bone.name for bone in armature.pose.bones}
+
+
+# The bake's input curves: every curve of the action outside the physics bones, whose curves the bake keys or replaces.
+# A bake of every bone also keys the body, but its body keys stay its input: leaving them out would give every clip
+# on the rig the same key.
+def bake_input_fcurves(armature, action):
+    skipped_bones = get_physics_bone_names(armature)
+    fcurves = []
+    for fcurve in sorted(action.fcurves, key=lambda fcurve: (fcurve.data_path, fcurve.array_index)):
+        bone_name, _ = parse_pose_bone_data_path(fcurve.data_path)
+        if bone_name not in skipped_bones:
+            fcurves.append(fcurve)
+    return fcurves
+
+
+# What a Visual Keying bake records besides the curves: whether the VRM add-on moves the spring bones at all, and the
+# constraints and drivers that pose the armature as the scene plays. The Spring Simulation evaluates none of these.
+def visual_bake_state(armature):
+    settings = get_spring_bone_settings(armature)
+    constraints = [[bone.name, constraint.name, constraint.type, constraint.mute, constraint.influence]
+                   for bone in armature.pose.bones for constraint in bone.constraints]
+    animation_data = armature.animation_data
+    drivers = [[fcurve.data_path, fcurve.array_index, fcurve.mute, fcurve.driver.expression]
+               for fcurve in animation_data.drivers] if animation_data else []
+    return [settings.enable_animation if settings is not None else None, constraints, drivers]
+
+
+# Hash of the bake's inputs. Without the curves it only covers the settings, which incremental bakes compare on their own.
+def bake_cache_key(scene, armature, action, baked_bones, include_curves=True):
+    fcurves = bake_input_fcurves(armature, action) if include_curves else []
+    settings = [
+        [bake_cache_version, scene.bake_engine, scene.bake_physics_only, list(action.frame_range), scene.render.fps, scene.render.fps_base],
+        sorted(baked_bones),
+        [[fcurve.data_path, fcurve.array_index] for fcurve in fcurves],
+        sorted([list(key), value] for key, value in read_spacing_layer_offsets(armature).items()),
+        [[bone.name, bone.parent.name if bone.parent else None, [list(row) for row in bone.matrix_local]] for bone in armature.data.bones],
+        [list(row) for row in armature.matrix_world],
+        collect_spring_chains(armature),
+        visual_bake_state(armature) if scene.bake_engine == 'VISUAL_KEYING' else None,
+    ]
+    return bake_cache_digest(settings, (read_keyframe_table(fcurve) for fcurve in fcurves))
+
+
+def bake_cache_path(scene, key):
+    return os.path.join(get_bake_cache_dir(scene), f"{key}.npz")
+
+
+# Restores the cached curves of a bake, returning False when the cache has no entry for the key.
+def restore_bake_cache(scene, armature, action, key):
+    path = bake_cache_path(scene, key)
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            curves = json.loads(str(archive["curves"]))
+            tables = [{name: archive[f"{index}_{name}"] for name in curve[3]} for index, curve in enumerate(curves)]
+    except (OSError, ValueError, KeyError):
+        return False
+
+    # Every curve is looked up before any is created, so the F-Curve index is only built once
+    fcurves = [find_action_fcurve(action, data_path, array_index) for data_path, array_index, _, _ in curves]
+    for (data_path, array_index, group, _), fcurve, table in zip(curves, fcurves, tables):
+        if fcurve is None:
+            fcurve = action.fcurves.new(data_path, index=array_index, action_group=group)
+        write_keyframe_table(fcurve, table)
+    if None in fcurves:
+        invalidate_action_fcurve_index(action)
+    armature.update_tag(refresh={'TIME'})
+
+    # Touching the entry marks it as recently used for the eviction
+    os.utime(path)
+    return True
+
+
+# Stores the curves of the baked bones under the key, then evicts the least recently used entries past the size limit.
+def store_bake_cache(scene, action, key, baked_bones):
+    curves = []
+    arrays = {}
+    for fcurve in find_bone_fcurves(action, baked_bones):
+        if len(fcurve.keyframe_points) == 0:
+            continue
+        table = read_keyframe_table(fcurve)
+        index = len(curves)
+        for name, values in table.items():
+            arrays[f"{index}_{name}"] = values
+        bone_name, _ = parse_pose_bone_data_path(fcurve.data_path)
+        curves.append([fcurve.data_path, fcurve.array_index, fcurve.group.name if fcurve.group else bone_name, sorted(table)])
+
+    cache_dir = get_bake_cache_dir(scene)
+    path = bake_cache_path(scene, key)
+    # Written under a temporary name first, so an interrupted write never leaves a broken entry behind
+    temporary_path = os.path.join(cache_dir, f"{key}.tmp.npz")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez_compressed(temporary_path, curves=np.array(json.dumps(curves)), **arrays)
+        os.replace(temporary_path, path)
+    except OSError as error:
+        print(f"VRM Bake: could not write bake cache {path}: {error}")
+        return
+    evict_bake_cache(cache_dir, scene.bake_cache_size * 1024 * 1024)
+
+
+def evict_bake_cache(cache_dir, size_limit):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= size_limit:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+        total -= size
+
+
+# ----------------------------- Incremental Bake -----------------------------
+# After a bake, a snapshot of the action is kept in memory: a fingerprint of every input and baked key and, for the
+# spring simulation, the chain state every few frames. The next incremental bake diffs the action's keys against it
+# and only re-bakes the frames the edited keys reach, splicing the new physics keys over the old ones.
+
+# Frames between the spring simulation checkpoints
+bake_checkpoint_interval = 10
+
+# Largest chain tail distance, in meters, at which a re-simulation has caught up with the previous bake
+bake_convergence_tolerance = 1e-5
+
+# Last bake snapshot of each action, by action pointer
+bake_snapshots = {}
+
+
+# Undo, redo and file loads can bring back keys from before the last bake, so the snapshots no longer describe them
+@persistent
+def clear_bake_snapshots(*args):
+    bake_snapshots.clear()
+
+
+# Incremental bakes need the body's keys to stay the bake's input, which a visual bake of every bone overwrites.
+def incremental_bake_supported(scene):
+    return scene.bake_engine == 'SPRING_SIMULATION' or scene.bake_physics_only
+
+
+# One 64-bit fingerprint per key of a keyframe table, mixing every attribute, so edited keys can be found without keeping copies of them.
+def key_fingerprints(table):
+    count = len(table["co"])
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64)
+    words = [np.ascontiguousarray(table[name], dtype=np.float32 if table[name].dtype.kind == 'f' else np.int32).reshape(count, -1).view(np.uint32) for name in sorted(table)]
+    words = np.concatenate(words, axis=1).astype(np.uint64)
+    weights = np.random.default_rng(0).integers(1, 2 ** 63, size=words.shape[1], dtype=np.uint64) | np.uint64(1)
+    return (words * weights).sum(axis=1)
+
+
+# (data path, index) -> (key frames, key fingerprints) of the curves.
+def fingerprint_fcurves(fcurves):
+    fingerprints = {}
+    for fcurve in fcurves:
+        table = read_keyframe_table(fcurve)
+        fingerprints[(fcurve.data_path, fcurve.array_index)] = (table["co"][:, 0].copy(), key_fingerprints(table))
+    return fingerprints
+
+
+def same_fingerprints(a, b):
+    if a.keys() != b.keys():
+        return False
+    return all(np.array_equal(a[curve][0], b[curve][0]) and np.array_equal(a[curve][1], b[curve][1]) for curve in a)
+
+
+# Frames over which a curve's value changed between two fingerprints, from the key before the first changed key to the
+# key after the last one, or None when no key changed. Changes to the first or last key reach out to the action's ends
+# through the extrapolation. Keys whose automatic handles moved with an edited neighbour count as changed too.
+def changed_key_range(old, new):
+    old_frames, old_prints = old
+    new_frames, new_prints = new
+    if np.array_equal(old_frames, new_frames):
+        frames = new_frames
+        changed = frames[old_prints != new_prints]
+    else:
+        old_keys = set(zip(old_frames.tolist(), old_prints.tolist()))
+        new_keys = set(zip(new_frames.tolist(), new_prints.tolist()))
+        frames = np.union1d(old_frames, new_frames)
+        changed = np.array(sorted({frame for frame, _ in old_keys ^ new_keys}))
+    if len(changed) == 0:
+        return None
+    first = np.searchsorted(frames, changed[0])
+    last = np.searchsorted(frames, changed[-1])
+    start = frames[first - 1] if first > 0 else -math.inf
+    end = frames[last + 1] if last + 1 < len(frames) else math.inf
+    return start, end
+
+
+# Union of the ranges the curves changed over, or None when no curve changed. Added or removed curves change everything.
+def dirty_frame_range(old, new):
+    start, end = math.inf, -math.inf
+    for curve in old.keys() | new.keys():
+        if curve not in old or curve not in new:
+            return -math.inf, math.inf
+        changed = changed_key_range(old[curve], new[curve])
+        if changed is not None:
+            start, end = min(start, changed[0]), max(end, changed[1])
+    if start > end:
+        return None
+    return start, end
+
+
+def store_bake_snapshot(scene, armature, action, baked_bones, checkpoints=None):
+    bake_snapshots[action.as_pointer()] = {
+        "settings": bake_cache_key(scene, armature, action, baked_bones, include_curves=False),
+        "inputs": fingerprint_fcurves(bake_input_fcurves(armature, action)),
+        "outputs": fingerprint_fcurves(find_bone_fcurves(action, baked_bones)),
+        "checkpoints": checkpoints
+    }
+
+
+# Frames to re-bake since the action's last bake, clamped to frame_start..frame_end, or None when nothing changed.
+# Everything is re-baked without a snapshot, when the settings changed, or when the baked keys themselves were
+# changed since (Loopify, Delete Highlighted Bones, hand edits), since they no longer hold the previous bake.
+def get_dirty_bake_range(scene, armature, action, baked_bones, frame_start, frame_end):
+    snapshot = bake_snapshots.get(action.as_pointer())
+    if snapshot is None or snapshot["settings"] != bake_cache_key(scene, armature, action, baked_bones, include_curves=False):
+        return frame_start, frame_end
+    if not same_fingerprints(snapshot["outputs"], fingerprint_fcurves(find_bone_fcurves(action, baked_bones))):
+        return frame_start, frame_end
+    dirty = dirty_frame_range(snapshot["inputs"], fingerprint_fcurves(bake_input_fcurves(armature, action)))
+    if dirty is None or dirty[0] > frame_end or dirty[1] < frame_start:
+        return None
+    return max(frame_start, int(math.floor(dirty[0]))), min(frame_end, int(math.ceil(dirty[1])))
+
+
+def spring_states_close(a, b):
+    return all(np.max(np.abs(x - y), initial=0.0) <= bake_convergence_tolerance for x, y in zip(a, b))
+
+
+# Re-simulates a spring bone bake from the last checkpoint before dirty_start, a checkpoint at a time, until past
+# dirty_end the chains are back in the state the previous bake had there: from then on it would key the same
+# rotations again. Resuming from a checkpoint is exact, so no warm-up frames are needed.
+# The new rotations are keyed in one splice. Returns the first and last frame re-keyed.
+def rebake_spring_bones(bake, checkpoints, frame_start, frame_end, dirty_start, dirty_end):
+    resume = max((frame for frame in checkpoints if frame_start <= frame < dirty_start), default=None)
+    bake.checkpoints = {}
+    bake.state = None
+    first = frame_start
+    if resume is not None:
+        bake.checkpoints = {frame: state for frame, state in checkpoints.items() if frame <= resume}
+        bake.state = checkpoints[resume]
+        bake.previous_rotations = {bone_name: read_rotation_key(bake.armature, bake.action, bone_name, resume) for bone_name in bake.joint_bones}
+        first = resume + 1
+
+    windows = []
+    window_start = first
+    while window_start <= frame_end:
+        window_end = min((window_start // bake_checkpoint_interval + 1) * bake_checkpoint_interval - 1, frame_end)
+        frames, inputs = bake.sample_window(window_start, window_end)
+        windows.append((frames, bake.simulate(inputs, frames)))
+        previous = checkpoints.get(window_end)
+        if window_end >= dirty_end and previous is not None and spring_states_close(bake.state, previous):
+            bake.checkpoints.update((frame, state) for frame, state in checkpoints.items() if frame > window_end)
+            break
+        window_start = window_end + 1
+
+    frames = np.concatenate([frames for frames, _ in windows])
+    bake.write_window(frames, np.concatenate([rotations for _, rotations in windows]))
+    return first, int(frames[-1])
+
+
+# Re-keys a visual pose bake over dirty_start..dirty_end. The scene is stepped from bake_warmup_frames before the
+# range so the VRM add-on's spring bones settle into their motion first, and keying goes on for as many frames past
+# it while the chains catch up with the previous bake. Returns the first and last frame re-keyed.
+def rebake_visual_poses(scene, bake, frame_start, frame_end, dirty_start, dirty_end):
+    sweep_start = max(frame_start, dirty_start - scene.bake_warmup_frames)
+    key_end = min(frame_end, dirty_end + scene.bake_warmup_frames)
+    if dirty_start > frame_start:
+        bake.previous_rotations = {bone_name: read_rotation_key(bake.armature, bake.action, bone_name, dirty_start - 1) for bone_name in bake.bone_names}
+
+    bake.begin_window(sweep_start, key_end)
+    for f, frame in enumerate(bake.frames):
+        counted_frame_set(scene, int(frame))
+        if frame >= dirty_start:
+            bake.sample(f)
+    bake.end_window(first_frame=dirty_start)
+    return dirty_start, key_end
+
+
+# ----------------------------- Spring Chain Index -----------------------------
+# Which bones of an armature are physics bones, as chains listed root to tip. The chains come from the VRM add-on's
+# spring bone joints; rigs without any fall back to the armature's physics bone name patterns, with each run of
+# matching parent and child bones read as a chain. The index is built once per armature data, and dropped by a depsgraph
+# handler when the bones or the VRM spring joints are edited, so a lookup costs next to nothing.
+
+# Default name pattern of the VRoid physics bones. A name part must not run on in lowercase, so "Ear" doesn't match "Earring".
+physics_bone_pattern_default = r"(Hair|Bust|Skirt|Sleeve|Ear|Tail)(?![a-z])"
+
+
+# Bone names of the VRM spring joints of an armature data, spring by spring. Only the depsgraph handler compares it,
+# on armature updates, so lookups never walk the joints.
+def spring_joint_names(data):
+    try:
+        springs = data.vrm_addon_extension.spring_bone1.springs
+    except AttributeError:
+        return ()
+    return tuple(tuple(joint.node.bone_name for joint in spring.joints) for spring in springs)
+
+
+# The cheap part of what an index was built from, checked on every lookup: the bone count and the patterns. It catches
+# edits made by scripts before any depsgraph update has run.
+def spring_chain_stamp(data):
+    return len(data.bones), data.physics_bone_pattern, data.physics_bone_exclude
+
+
+class SpringChainIndex:
+    def __init__(self, armature):
+        data = armature.data
+        bones = data.bones
+        self.stamp = spring_chain_stamp(data)
+        self.joints = spring_joint_names(data)
+        self.patterns = self.stamp[1:]
+        self.pattern_error = None
+        self.chains = []
+        # (spring index, joint indices) of the VRM springs, keeping the joints whose bones exist
+        self.springs = []
+
+        for spring_index, spring_joints in enumerate(self.joints):
+            joint_indices = [j for j, bone_name in enumerate(spring_joints) if bone_name in bones]
+            if joint_indices:
+                self.springs.append((spring_index, joint_indices))
+                self.chains.append([spring_joints[j] for j in joint_indices])
+        self.from_vrm = bool(self.chains)
+        if not self.from_vrm:
+            self.chains = self.pattern_chains(bones)
+
+        self.bone_names = frozenset(bone_name for chain in self.chains for bone_name in chain)
+        self.bone_chains = {bone_name: c for c, chain in enumerate(self.chains) for bone_name in chain}
+
+    # Chains of the bones matching the include pattern and not the exclude one. A branching bone continues its chain
+    # into its first matching child (by name), and every other matching child starts a chain of its own.
+    def pattern_chains(self, bones):
+        try:
+            include = re.compile(self.patterns[0]) if self.patterns[0] else None
+            exclude = re.compile(self.patterns[1]) if self.patterns[1] else None
+        except re.error as error:
+            self.pattern_error = str(error)
+            return []
+        if include is None:
+            return []
+        matched = {bone.name for bone in bones if include.search(bone.name) and not (exclude and exclude.search(bone.name))}
+
+        chains = []
+        roots = sorted((bones[bone_name] for bone_name in matched if bones[bone_name].parent is None or bones[bone_name].parent.name not in matched), key=lambda bone: bone.name)
+        pending = [(root, None) for root in reversed(roots)]
+        while pending:
+            bone, chain = pending.pop()
+            if chain is None:
+                chain = []
+                chains.append(chain)
+            chain.append(bone.name)
+            children = sorted((child for child in bone.children if child.name in matched), key=lambda child: child.name)
+            pending.extend((child, None) for child in reversed(children[1:]))
+            if children:
+                pending.append((children[0], chain))
+        return chains
+
+
+# Built indices, keyed by the armature data's pointer
+spring_chain_indices = {}
+
+
+def get_spring_chain_index(armature):
+    data = armature.data
+    key = data.as_pointer()
+    index = spring_chain_indices.get(key)
+    if index is None or index.stamp != spring_chain_stamp(data):
+        index = SpringChainIndex(armature)
+        spring_chain_indices[key] = index
+    return index
+
+
+# Drops the index of an armature data whose bones were edited (edit mode, renames, parenting), or whose VRM spring
+# joints changed. Selecting or posing bones updates the data too, but leaves its index alone.
+@persistent
+def invalidate_spring_chain_indices(scene, depsgraph):
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Armature):
+            continue
+        data = update.id.original
+        index = spring_chain_indices.get(data.as_pointer())
+        if index is not None and (update.is_updated_geometry or index.joints != spring_joint_names(data)):
+            del spring_chain_indices[data.as_pointer()]
+
+
+@persistent
+def clear_spring_chain_indices(*args):
+    spring_chain_indices.clear()
+
+
+# Names of an armature's physics bones, from its spring chain index.
+def get_physics_bone_names(armature):
+    return get_spring_chain_index(armature).bone_names
+
+
+def get_highlighted_bone_names(armature):
+    return [bone.name for bone in armature.data.bones if bone.select]
+
+
+# Highlighted bones of an armature, or its physics bones when none are highlighted. Deleting never falls back, as it
+# would silently remove the physics bones' animation.
+def get_target_bone_names(armature):
+    return get_highlighted_bone_names(armature) or sorted(get_physics_bone_names(armature))
+
+
+# ----------------------------- Animation Helper Functions -----------------------------
+
+
+# Operator to select physics bones
+class SelectPhysicsBonesOperator(bpy.types.Operator):
+    bl_idname = "object.select_physics_bones"
+    bl_label = "Select Physics Bones"
+    bl_description = "This selects all the possible physics bones that could exist on your VRM model."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+
+        # Ensure we are in Pose Mode
+        if bpy.context.mode != 'POSE':
+            bpy.ops.object.mode_set(mode='POSE')
+
+        index = get_spring_chain_index(armature)
+        if index.pattern_error:
+            self.report({'ERROR'}, f"Invalid physics bone pattern: {index.pattern_error}")
+            return {'CANCELLED'}
+
+        # Deselect all bones first
+        bpy.ops.pose.select_all(action='DESELECT')
+
+        # Select the bones of every spring chain
+        bones = armature.data.bones
+        for bone_name in index.bone_names:
+            bones[bone_name].select = True
+
+        source = "VRM spring bones" if index.from_vrm else "name patterns"
+        self.report({'INFO'}, f"Selected {len(index.bone_names)} physics bones in {len(index.chains)} chains (from the {source}).")
+        return {'FINISHED'}
+
+
+# Operator to delete highlighted bones from animation
+class DeleteHighlightedBonesOperator(bpy.types.Operator):
+    bl_idname = "object.delete_highlighted_bones"
+    bl_label = "Delete Highlighted Bones from Animation"
+    bl_description = "This removes the physics bones from the current animation, which is often the case when retargeting animations to the VRM model."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+        anim_data = armature.animation_data
+
+        if bpy.context.mode != 'POSE':
+            self.report({'WARNING'}, "You must be in Pose Mode.")
+            return {'CANCELLED'}
+
+        if not armature.pose.bones:
+            self.report({'WARNING'}, "No bones selected.")
+            return {'CANCELLED'}
+
+        if anim_data is None or anim_data.action is None:
+            self.report({'WARNING'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        selected_bones = get_highlighted_bone_names(armature)
+
+        if not selected_bones:
+            self.report({'WARNING'}, "No bones selected.")
+            return {'CANCELLED'}
+
+        # Remove the F-Curves of all transformations of the selected bones
+        action = anim_data.action
+        with operator_phase("index"):
+            base = read_action_arrays(action, find_bone_fcurves(action, selected_bones))
+        remaining, keys_removed, _ = delete_action_bones(base, selected_bones)
+        with operator_phase("remove"):
+            write_action_arrays(action, remaining, base)
+        count_operator_stat("keys_removed", keys_removed)
+
+        return {'FINISHED'}
+
+
+# Operator to toggle VRM Spring Bone Physics
+class ToggleVRMSpringBonePhysicsOperator(bpy.types.Operator):
+    bl_idname = "object.toggle_vrm_spring_bone_physics"
+    bl_label = "Enable/Disable VRM Spring Bone Physics"
+    bl_description = "Enable VRM Spring Bone Physics for baking; disable before creating looping animations."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        # Toggle the selected armatures, or the first armature in the scene when none is selected
+        armatures = get_selected_armatures(context)
+        if not armatures:
+            armatures = [obj for obj in bpy.context.scene.objects if obj.type == 'ARMATURE'][:1]
+
+        if not armatures:
+            self.report({'ERROR'}, "No Armature object found in the scene.")
+            return {'CANCELLED'}
+        armature = armatures[0]
+
+        # Set the Armature as the active object and select it
+        bpy.context.view_layer.objects.active = armature
+        armature.select_set(True)
+
+        # Access the VRM Spring Bone settings
+        try:
+            # Toggle the spring bone physics status, following the active armature so every character ends up alike
+            enabled = not getattr(armature.data.vrm_addon_extension.spring_bone1, 'enable_animation', False)
+            for target in armatures:
+                target.data.vrm_addon_extension.spring_bone1.enable_animation = enabled
+            
+            # Update the scene property to reflect the toggle status
+            context.scene.vrm_spring_bone_physics_enabled = enabled
+
+            status = "enabled" if enabled else "disabled"
+            self.report({'INFO'}, f"VRM Spring Bone Physics {status}.")
+
+        except AttributeError:
+            self.report({'ERROR'}, "VRM Spring Bone system not available.")
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+    
+class AdjustPlaybackAndBakeOperator(bpy.types.Operator):
+    bl_idname = "object.adjust_playback_and_bake"
+    bl_label = "Adjust Playback Range and Bake Animation"
+    bl_description = "Bakes the hair physics into the animation and also changes the playback range of the scene to that of the animation. If you don't need a looping animation, this is the final step."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        scene = context.scene
+        armature = context.object
+
+        # Ensure we're in Object Mode
+        if bpy.context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        # Get the action
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        if scene.bake_engine == 'SPRING_SIMULATION' and get_spring_bone_settings(armature) is None:
+            self.report({'ERROR'}, "VRM Spring Bone system not available.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+
+        # Adjust playback range's final frame to match the final frame of the current action
+        start_frame = int(action.frame_range[0])
+        final_frame = int(action.frame_range[1])
+        scene.frame_end = final_frame
+
+        # Unchanged clips restore their last bake from the cache
+        cache_key = None
+        if scene.use_bake_cache:
+            with operator_phase("cache"):
+                baked_bones = get_baked_bone_names(scene, armature)
+                cache_key = bake_cache_key(scene, armature, action, baked_bones)
+                restored = restore_bake_cache(scene, armature, action, cache_key)
+            record_operator_detail("bake_cache", "hit" if restored else "miss")
+            if restored:
+                if scene.use_incremental_bake and incremental_bake_supported(scene):
+                    store_bake_snapshot(scene, armature, action, baked_bones)
+                self.report({'INFO'}, f"Playback range adjusted to frame {final_frame} and the unchanged bake restored from the cache.")
+                return {'FINISHED'}
+
+        # Incremental bakes only re-bake the frames that the keys edited since the action's last bake reach
+        incremental = scene.use_incremental_bake and incremental_bake_supported(scene)
+        dirty = (start_frame, final_frame)
+        if incremental:
+            with operator_phase("diff"):
+                baked_bones = get_baked_bone_names(scene, armature)
+                dirty = get_dirty_bake_range(scene, armature, action, baked_bones, start_frame, final_frame)
+            record_operator_detail("dirty_frames", list(dirty) if dirty else None)
+            if dirty is None:
+                self.report({'INFO'}, f"Playback range adjusted to frame {final_frame}; nothing changed since the last bake.")
+                return {'FINISHED'}
+        partial = dirty != (start_frame, final_frame)
+        rebaked = dirty
+        checkpoints = None
+
+        # Bake Animation
+        if scene.bake_engine == 'SPRING_SIMULATION':
+            with operator_phase("simulate"):
+                bake = SpringBoneBake(scene, armature, action)
+                if bake.chains:
+                    previous_checkpoints = bake_snapshots.get(action.as_pointer(), {}).get("checkpoints") if partial else None
+                    if previous_checkpoints:
+                        rebaked = rebake_spring_bones(bake, previous_checkpoints, start_frame, final_frame, *dirty)
+                    else:
+                        rebaked = (start_frame, final_frame)
+                        bake.bake_window(start_frame, final_frame)
+            if not bake.chains:
+                self.report({'ERROR'}, "No VRM spring bone chains found to simulate.")
+                return {'CANCELLED'}
+            checkpoints = bake.checkpoints
+            armature.update_tag(refresh={'TIME'})
+        elif partial:
+            if not baked_bones:
+                self.report({'ERROR'}, "No physics bones found to bake.")
+                return {'CANCELLED'}
+            original_frame = scene.frame_current
+            with operator_phase("visual_bake"):
+                rebaked = rebake_visual_poses(scene, VisualPoseBake(scene, armature, action, baked_bones), start_frame, final_frame, *dirty)
+            counted_frame_set(scene, original_frame)
+            armature.update_tag(refresh={'TIME'})
+        else:
+            bpy.ops.object.mode_set(mode='POSE')  # Switch to Pose Mode
+
+            # Physics only: key just the physics bones, leaving the body's original keys untouched
+            physics_only = scene.bake_physics_only
+            if physics_only:
+                physics_bones = get_physics_bone_names(armature)
+                if not physics_bones:
+                    bpy.ops.object.mode_set(mode='OBJECT')
+                    self.report({'ERROR'}, "No physics bones found to bake.")
+                    return {'CANCELLED'}
+                previous_selection = {bone.name for bone in armature.data.bones if bone.select}
+                for bone in armature.data.bones:
+                    bone.select = bone.name in physics_bones
+
+            with operator_phase("visual_bake"):
+                bpy.ops.nla.bake(
+                    frame_start=start_frame,
+                    frame_end=final_frame,
+                    bake_types={'POSE'},
+                    visual_keying=True,
+                    clear_constraints=False,
+                    use_current_action=True,
+                    only_selected=physics_only
+                )
+            # nla.bake steps every frame of the range and then returns to the current one
+            count_operator_stat("frame_set", final_frame - start_frame + 2)
+
+            if physics_only:
+                for bone in armature.data.bones:
+                    bone.select = bone.name in previous_selection
+
+            bpy.ops.object.mode_set(mode='OBJECT')  # Switch back to Object Mode
+            invalidate_action_fcurve_index(action)
+
+        if cache_key is not None:
+            with operator_phase("cache"):
+                store_bake_cache(scene, action, cache_key, baked_bones)
+        if incremental:
+            with operator_phase("diff"):
+                store_bake_snapshot(scene, armature, action, baked_bones, checkpoints)
+
+        if rebaked != (start_frame, final_frame):
+            record_operator_detail("rebaked_frames", list(rebaked))
+            self.report({'INFO'}, f"Playback range adjusted to frame {final_frame} and frames {rebaked[0]} to {rebaked[1]} re-baked.")
+            return {'FINISHED'}
+        self.report({'INFO'}, f"Playback range adjusted to frame {final_frame} and animation baked from frame {start_frame}.")
+        return {'FINISHED'}
+    
+# ----------------------------- Modal Bake Operator -----------------------------
+class ModalBakeOperator(bpy.types.Operator):
+    bl_idname = "object.modal_bake"
+    bl_label = "Bake with Progress"
+    bl_description = "Bakes like Adjust Playback & Bake, one window of frames at a time, showing the progress in this panel. Press Esc to stop early; the frames baked so far are kept."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Whether a modal bake is running, read by the panel to show the progress bar
+    running = False
+
+    def invoke(self, context, event):
+        if ModalBakeOperator.running:
+            self.report({'WARNING'}, "A bake is already running.")
+            return {'CANCELLED'}
+
+        run = begin_operator_run(self, context)
+        result = self.start(context)
+        if result is not None:
+            end_operator_run(run, result, context)
+            return result
+
+        # Between windows other operators may run, so the run is only current while a window bakes
+        operator_run_stack.remove(run)
+        self.run = run
+        context.scene.bake_progress = 0.0
+        context.scene.bake_progress_status = "Starting..."
+        ModalBakeOperator.running = True
+
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    # Run from a script (bpy.ops.object.modal_bake()), every window is baked right away, without the progress display.
+    @instrumented_execute
+    def execute(self, context):
+        if ModalBakeOperator.running:
+            self.report({'WARNING'}, "A bake is already running.")
+            return {'CANCELLED'}
+        result = self.start(context)
+        if result is not None:
+            return result
+
+        while self.next_frame <= self.frame_end:
+            with operator_phase("window"):
+                self.bake_next_window(context.scene)
+        self.complete(context.scene)
+        if isinstance(self.bake, VisualPoseBake):
+            counted_frame_set(context.scene, self.original_frame)
+        self.armature.update_tag(refresh={'TIME'})
+        self.report({'INFO'}, f"Playback range adjusted to frame {self.frame_end} and animation baked in {time.perf_counter() - self.start_time:.1f}s.")
+        return {'FINISHED'}
+
+    # Prepares the bake. Returns None when it's ready to bake its windows, otherwise the operator's result.
+    def start(self, context):
+        scene = context.scene
+        armature = context.object
+
+        if armature is None or armature.type != 'ARMATURE':
+            self.report({'ERROR'}, "Select the VRM armature first.")
+            return {'CANCELLED'}
+
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        if scene.bake_engine == 'SPRING_SIMULATION' and get_spring_bone_settings(armature) is None:
+            self.report({'ERROR'}, "VRM Spring Bone system not available.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+        self.frame_start = int(action.frame_range[0])
+        self.frame_end = int(action.frame_range[1])
+        scene.frame_end = self.frame_end
+
+        # Ensure we're in Object Mode
+        if bpy.context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        if scene.bake_engine == 'SPRING_SIMULATION':
+            self.bake = SpringBoneBake(scene, armature, action)
+            if not self.bake.chains:
+                self.report({'ERROR'}, "No VRM spring bone chains found to simulate.")
+                return {'CANCELLED'}
+        else:
+            bone_names = get_physics_bone_names(armature) if scene.bake_physics_only else {bone.name for bone in armature.pose.bones}
+            if not bone_names:
+                self.report({'ERROR'}, "No physics bones found to bake.")
+                return {'CANCELLED'}
+            self.bake = VisualPoseBake(scene, armature, action, bone_names)
+
+        # Unchanged clips restore their last bake from the cache instead of stepping through it
+        self.cache_key = None
+        if scene.use_bake_cache:
+            self.baked_bones = get_baked_bone_names(scene, armature)
+            self.cache_key = bake_cache_key(scene, armature, action, self.baked_bones)
+            if restore_bake_cache(scene, armature, action, self.cache_key):
+                self.report({'INFO'}, f"Playback range adjusted to frame {self.frame_end} and the unchanged bake restored from the cache.")
+                return {'FINISHED'}
+
+        self.armature = armature
+        self.action = action
+        self.next_frame = self.frame_start
+        self.original_frame = scene.frame_current
+        self.start_time = time.perf_counter()
+        return None
+
+    # Bakes and commits the next window, so only that window's samples are ever held in memory. Returns its last frame.
+    def bake_next_window(self, scene):
+        window_end = min(self.next_frame + scene.bake_window_size - 1, self.frame_end)
+        self.bake.bake_window(self.next_frame, window_end)
+        self.next_frame = window_end + 1
+        return window_end
+
+    # Caches and snapshots a complete bake; stopped bakes are neither.
+    def complete(self, scene):
+        if self.cache_key is not None:
+            store_bake_cache(scene, self.action, self.cache_key, self.baked_bones)
+        if scene.use_incremental_bake and incremental_bake_supported(scene):
+            checkpoints = self.bake.checkpoints if isinstance(self.bake, SpringBoneBake) else None
+            store_bake_snapshot(scene, self.armature, self.action, get_baked_bone_names(scene, self.armature), checkpoints)
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self.run.record["details"]["stopped_at_frame"] = self.next_frame - 1
+            self.finish(context)
+            # Finish rather than cancel, so the windows already baked get their undo step
+            self.report({'WARNING'}, f"Bake stopped; frames {self.frame_start} to {self.next_frame - 1} were baked.")
+            return {'FINISHED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        scene = context.scene
+        try:
+            window_end = self.bake_counted_window(scene)
+        except Exception as error:
+            # Stop the timer and the progress bar rather than leave them running; the windows before stay baked
+            self.run.record["details"]["error"] = str(error)
+            self.finish(context, cancelled=True)
+            self.report({'ERROR'}, f"Bake failed at frame {self.next_frame}: {error}")
+            return {'CANCELLED'}
+
+        done = (self.next_frame - self.frame_start) / max(1, self.frame_end - self.frame_start + 1)
+        elapsed = time.perf_counter() - self.start_time
+        remaining = elapsed / done * (1.0 - done) if done > 0 else 0.0
+        scene.bake_progress = done * 100.0
+        scene.bake_progress_status = f"Frame {window_end} of {self.frame_end}, about {remaining:.0f}s left"
+        context.window_manager.progress_update(done * 100.0)
+        self.redraw_panels(context)
+
+        if self.next_frame > self.frame_end:
+            self.complete(scene)
+            self.finish(context)
+            self.report({'INFO'}, f"Playback range adjusted to frame {self.frame_end} and animation baked in {elapsed:.1f}s.")
+            return {'FINISHED'}
+        return {'RUNNING_MODAL'}
+
+    # Bakes the next window with its stats counted in the operator's run, which isn't the current one between events.
+    def bake_counted_window(self, scene):
+        operator_run_stack.append(self.run)
+        try:
+            with operator_phase("window"):
+                return self.bake_next_window(scene)
+        finally:
+            operator_run_stack.remove(self.run)
+
+    def finish(self, context, cancelled=False):
+        end_operator_run(self.run, {'CANCELLED'} if cancelled else {'FINISHED'}, context)
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        ModalBakeOperator.running = False
+
+        if isinstance(self.bake, VisualPoseBake):
+            counted_frame_set(context.scene, self.original_frame)
+        self.armature.update_tag(refresh={'TIME'})
+        self.redraw_panels(context)
+
+    def redraw_panels(self, context):
+        if context.screen is None:
+            return
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+# ----------------------------- Loopify Physics Operator -----------------------------
+class LoopifyPhysicsOperator(bpy.types.Operator):
+    bl_idname = "object.loopify_physics"
+    bl_label = "Loopify Physics"
+    bl_description = "Deletes the front or back of the animation's physics and inserts the opposite side's last or first frame of physics bones, making the animation loop seamlessly. The more frame easing there is, the more frames are deleted, at the cost of less precise physics for a longer portion of the animation. This is the final step for looping animations."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Use the frame easing defined in the scene properties
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+
+        # Ensure we are in Pose Mode
+        if bpy.context.mode != 'POSE':
+            bpy.ops.object.mode_set(mode='POSE')
+
+        # Get the action
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+        frame_range = action.frame_range
+        start_frame = int(frame_range[0])
+        end_frame = int(frame_range[1])
+
+        # Get user input for frame selection and easing value from context
+        frame_selection = context.scene.frame_selection
+        frame_easing = context.scene.loopify_frame_easing  # Correctly fetching frame easing from the scene property
+
+        # Determine the copy frame and delete frame range based on user selection
+        copy_frame, delete_range_start, delete_range_end, paste_frame = loopify_frames(context.scene, start_frame, end_frame)
+
+        # Record the loop settings with the run
+        record_operator_detail("frame_range", [start_frame, end_frame])
+        record_operator_detail("frame_selection", frame_selection)
+        record_operator_detail("frame_easing", frame_easing)
+        record_operator_detail("copy_frame", copy_frame)
+        record_operator_detail("delete_range", [delete_range_start, delete_range_end])
+        record_operator_detail("paste_frame", paste_frame)
+
+        # Get selected bones, or the physics bones when none are
+        selected_bones = get_target_bone_names(armature)
+        if not selected_bones:
+            self.report({'ERROR'}, "No bones selected and no physics bones found.")
+            return {'CANCELLED'}
+        record_operator_detail("selected_bones", len(selected_bones))
+
+        # Get the F-Curves of the selected bones, matching bone names exactly
+        with operator_phase("index"):
+            fcurves = find_bone_fcurves(action, selected_bones)
+
+        keys_changed, keys_inserted = loopify_action(context.scene, action, fcurves, copy_frame, delete_range_start, delete_range_end, paste_frame)
+        changed = "blended" if context.scene.loopify_seam_mode == 'CROSSFADE' else "removed"
+        self.report({'INFO'}, f"Loopify {changed} {keys_changed} keys and inserted {keys_inserted} keys across {len(fcurves)} F-Curves.")
+        return {'FINISHED'}
+
+
+# ----------------------------- Loop Point Search Operator -----------------------------
+class FindLoopPointOperator(bpy.types.Operator):
+    bl_idname = "object.find_loop_point"
+    bl_label = "Find Loop Point"
+    bl_description = "Compares the baked physics of the selected bones near the start and the end of the animation, and picks the copy frame, paste frame and frame easing giving the smoothest loop. The frames are set in Loopify's Custom Frames mode, the scene range is set to the loop, and Loopify is run with them."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    apply_loopify: bpy.props.BoolProperty(name="Loopify", description="Run Loopify with the frames found", default=True)
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+        scene = context.scene
+
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+        selected_bones = get_target_bone_names(armature)
+        if not selected_bones:
+            self.report({'ERROR'}, "No bones selected and no physics bones found.")
+            return {'CANCELLED'}
+
+        start_frame = int(action.frame_range[0])
+        end_frame = int(action.frame_range[1])
+        frames = np.arange(start_frame, end_frame + 1, dtype=np.float64)
+        with operator_phase("sample"):
+            features = sample_loop_features(action, selected_bones, frames)
+        if features.shape[1] == 0:
+            self.report({'ERROR'}, "The selected bones have no keys to compare.")
+            return {'CANCELLED'}
+
+        # Keep easing on the side the current frame selection eases, the start of the clip unless First Frame is chosen
+        if scene.frame_selection == 'CUSTOM_FRAMES':
+            ease_after_paste = scene.loopify_paste_frame < scene.loopify_copy_frame
+        else:
+            ease_after_paste = scene.frame_selection == 'LAST_FRAME'
+        with operator_phase("search"):
+            found = find_loop_point(features, scene.loop_search_window, ease_after_paste)
+        if found is None:
+            self.report({'ERROR'}, "The animation is too short to search for a loop point.")
+            return {'CANCELLED'}
+
+        a, b, easing, seam_error = found
+        loop_start = start_frame + a
+        loop_end = start_frame + b - 1
+        scene.frame_selection = 'CUSTOM_FRAMES'
+        scene.loopify_copy_frame = loop_end + 1 if ease_after_paste else loop_start
+        scene.loopify_paste_frame = loop_start if ease_after_paste else loop_end + 1
+        scene.loopify_frame_easing = easing
+        scene.frame_start = loop_start
+        scene.frame_end = loop_end
+        record_operator_detail("loop", [loop_start, loop_end])
+        record_operator_detail("frame_easing", easing)
+        record_operator_detail("seam_error", seam_error)
+
+        if self.apply_loopify:
+            result = bpy.ops.object.loopify_physics()
+            if result != {'FINISHED'}:
+                return result
+
+        self.report({'INFO'}, f"Loop from frame {loop_start} to {loop_end} with {easing} frames of easing (seam error {seam_error:.4f}).")
+        return {'FINISHED'}
+
+
+# ----------------------------- Keyframe Reduction Operator -----------------------------
+class ReducePhysicsKeysOperator(bpy.types.Operator):
+    bl_idname = "object.reduce_physics_keys"
+    bl_label = "Reduce Baked Keys"
+    bl_description = "Removes the baked keys of the selected bones that the neighbouring keys already describe within the tolerances below, keeping the Loopify seam. Run it after baking and Loopify to make the animation lighter to save and export."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @instrumented_execute
+    def execute(self, context):
+        armature = context.object
+        scene = context.scene
+
+        anim_data = armature.animation_data
+        if anim_data is None or anim_data.action is None:
+            self.report({'ERROR'}, "No animation data found.")
+            return {'CANCELLED'}
+
+        action = anim_data.action
+        selected_bones = get_target_bone_names(armature)
+        if not selected_bones:
+            self.report({'ERROR'}, "No bones selected and no physics bones found.")
+            return {'CANCELLED'}
+
+        seam_frames = np.array(action.get(loopify_seam_frames_key, []), dtype=np.float32)
+        base = read_action_arrays(action, find_bone_fcurves(action, selected_bones))
+        with operator_phase("reduce"):
+            reduced, keys_before, keys_after = reduce_action_arrays(base, scene.reduce_angle_tolerance, scene.reduce_value_tolerance, seam_frames)
+            write_action_arrays(action, reduced, base)
+        count_operator_stat("keys_removed", keys_before - keys_after)
+
+        self.report({'INFO'}, f"Baked keys reduced from {keys_before} to {keys_after}.")
+        return {'FINISHED'}
+
+
+# ----------------------------- Apply to All -----------------------------
+# Spacing, Delete, Bake and Loopify over every selected armature and every chosen action. Blender data is read and
+# written on the main thread, while the NumPy work of each action (Loopify rewrites, spring simulations) runs in a
+# thread pool. Visual keying bakes every character in the same scene sweep.
+
+# Threads for the NumPy work of Apply to All
+apply_all_workers = min(8, os.cpu_count() or 1)
+
+
+# Selected armatures, the active one first.
+def get_selected_armatures(context):
+    armatures = [obj for obj in context.selected_objects if obj.type == 'ARMATURE']
+    active = context.object
+    if active is not None and active.type == 'ARMATURE':
+        if active in armatures:
+            armatures.remove(active)
+        armatures.insert(0, active)
+    return armatures
+
+
+# (armature, actions) for every selected armature: its current action, or the actions ticked in the panel that key its bones.
+def get_apply_all_targets(context):
+    targets = []
+    for armature in get_selected_armatures(context):
+        anim_data = armature.animation_data
+        if context.scene.apply_all_action_scope == 'ACTIVE':
+            actions = [anim_data.action] if anim_data is not None and anim_data.action is not None else []
+        else:
+            bone_names = [bone.name for bone in armature.pose.bones]
+            actions = [action for action in bpy.data.actions if action.vrm_apply_all and find_bone_fcurves(action, bone_names)]
+        if actions:
+            targets.append((armature, actions))
+    return targets
+
+
+def apply_spacing_to_all(context, targets):
+    scene = context.scene
+    if scene.spacing_mode == 'LAYER':
+        # The layer sits under whatever action the armature plays, so it is set once per armature, like Set Layer
+        # Spacing does, and the actions' keys stay untouched. The layer is placed at the current action.
+        layered = 0
+        for armature, _ in targets:
+            if armature.animation_data is not None and armature.animation_data.action is not None:
+                set_spacing_layer_offsets(armature, pair_spacing_layer_offsets(scene))
+                layered += 1
+        return f"Spacing layer set on {layered} armatures"
+
+    offsets = {key: [value] for key, value in pair_spacing_layer_offsets(scene).items()}
+    changed = 0
+    for armature, actions in targets:
+        for action in actions:
+            changed += apply_spacing_offsets(armature, offsets, action)
+    return f"Spacing applied to {changed} keys"
+
+
+def delete_bones_from_all(context, targets):
+    removed = 0
+    for armature, actions in targets:
+        selected_bones = get_highlighted_bone_names(armature)
+        for action in actions:
+            base = read_action_arrays(action, find_bone_fcurves(action, selected_bones))
+            remaining, keys_removed, curves_removed = delete_action_bones(base, selected_bones)
+            write_action_arrays(action, remaining, base)
+            count_operator_stat("keys_removed", keys_removed)
+            removed += curves_removed
+    return f"Removed {removed} F-Curves"
+
+
+def loopify_all(context, targets, pool):
+    scene = context.scene
+    keys_changed = 0
+    keys_inserted = 0
+    for armature, actions in targets:
+        selected_bones = get_target_bone_names(armature)
+        for action in actions:
+            frames = loopify_frames(scene, int(action.frame_range[0]), int(action.frame_range[1]))
+            changed, inserted = loopify_action(scene, action, find_bone_fcurves(action, selected_bones), *frames, map_function=pool.map)
+            keys_changed += changed
+            keys_inserted += inserted
+    changed = "blended" if scene.loopify_seam_mode == 'CROSSFADE' else "removed"
+    return f"Loopify {changed} {keys_changed} keys and inserted {keys_inserted} keys"
+
+
+def bake_all(context, targets, pool):
+    scene = context.scene
+    if scene.bake_engine == 'SPRING_SIMULATION':
+        # Sample every action, simulate them side by side in the pool, then key the results
+        bakes = []
+        for armature, actions in targets:
+            for action in actions:
+                bake = SpringBoneBake(scene, armature, action)
+                if bake.chains:
+                    bakes.append((bake, *bake.sample_window(int(action.frame_range[0]), int(action.frame_range[1]))))
+        with operator_phase("simulate"):
+            rotations = list(pool.map(lambda job: job[0].simulate(job[2], job[1]), bakes))
+        baked = sum(bake.write_window(frames, rotation) for (bake, frames, _), rotation in zip(bakes, rotations))
+        for armature, _ in targets:
+            armature.update_tag(refresh={'TIME'})
+        return f"Baked {baked} spring joints across {len(bakes)} actions"
+
+    # An armature plays one action at a time, so each round gives every armature its next action and sweeps them together
+    for armature, _ in targets:
+        if armature.animation_data is None:
+            armature.animation_data_create()
+    original_actions = {armature: armature.animation_data.action for armature, _ in targets}
+    original_frame = scene.frame_current
+    baked = 0
+    try:
+        for round_index in range(max(len(actions) for _, actions in targets)):
+            bakes = []
+            for armature, actions in targets:
+                if round_index >= len(actions):
+                    continue
+                action = actions[round_index]
+                armature.animation_data.action = action
+                bone_names = get_physics_bone_names(armature) if scene.bake_physics_only else {bone.name for bone in armature.pose.bones}
+                if bone_names:
+                    bakes.append((VisualPoseBake(scene, armature, action, bone_names), int(action.frame_range[0]), int(action.frame_range[1])))
+            with operator_phase("sweep"):
+                baked += bake_visual_poses_together(scene, bakes)
+    finally:
+        for armature, action in original_actions.items():
+            armature.animation_data.action = action
+        counted_frame_set(scene, original_frame)
+    return f"Baked {baked} bones"
+
+
+class ApplyToAllOperator(bpy.types.Operator):
+    bl_idname = "object.apply_to_all"
+    bl_label = "Apply to All"
+    bl_description = "Runs the chosen step on every selected armature, for each one's current action or for every action ticked in the list."
+    bl_options = {'REGISTER', 'UNDO'}
+
+    task: bpy.props.EnumProperty(
+        name="Step",
+        items=[('SPACING', "Adjust Spacing", "Add the spacing value of the selected bone pair, or set it on each armature's spacing layer in Layer mode"),
+               ('DELETE', "Delete Highlighted Bones", "Remove each armature's selected bones from the actions"),
+               ('BAKE', "Bake", "Bake with the chosen bake engine over each action's frame range"),
+               ('LOOPIFY', "Loopify Physics", "Loopify each armature's selected bones with the Loopify settings")],
+        default='BAKE'
+    )
+
+    @instrumented_execute
+    def execute(self, context):
+        targets = get_apply_all_targets(context)
+        if not targets:
+            self.report({'ERROR'}, "No selected armature has an action to work on.")
+            return {'CANCELLED'}
+        action_count = sum(len(actions) for _, actions in targets)
+        record_operator_detail("armatures", len(targets))
+        record_operator_detail("actions", action_count)
+
+        if self.task == 'DELETE' and not any(get_highlighted_bone_names(armature) for armature, _ in targets):
+            self.report({'WARNING'}, "No bones selected.")
+            return {'CANCELLED'}
+        if self.task == 'BAKE' and context.scene.bake_engine == 'SPRING_SIMULATION' and any(get_spring_bone_settings(armature) is None for armature, _ in targets):
+            self.report({'ERROR'}, "VRM Spring Bone system not available.")
+            return {'CANCELLED'}
+
+        if bpy.context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        with ThreadPoolExecutor(max_workers=apply_all_workers) as pool:
+            if self.task == 'SPACING':
+                summary = apply_spacing_to_all(context, targets)
+            elif self.task == 'DELETE':
+                summary = delete_bones_from_all(context, targets)
+            elif self.task == 'LOOPIFY':
+                summary = loopify_all(context, targets, pool)
+            else:
+                summary = bake_all(context, targets, pool)
+
+        self.report({'INFO'}, f"{summary} across {action_count} actions of {len(targets)} armatures.")
+        return {'FINISHED'}
+
+
+# Example UI Panel code snippet for adding new controls
+class SpacingPanel(bpy.types.Panel):
+    bl_label = "VRM Space Anime Baking"
+    bl_idname = "OBJECT_PT_spacing"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'VRM Space Anime Baking'
+
+    def draw(self, context):
+        layout = self.layout
+
+        # ------------------- Spacing Section -------------------
+        layout.label(text="Bone Spacing Adjuster", icon='ARMATURE_DATA')
+
+        row = layout.row(align=True)
+        row.prop(context.scene, 'selected_bone_pair', text="Bone Pair")
+        row = layout.row(align=True)
+        row.prop(context.scene, 'affect_left_prop', text="Affect Left", icon='TRIA_LEFT')
+        row.prop(context.scene, 'affect_right_prop', text="Affect Right", icon='TRIA_RIGHT')
+
+        layout.prop(context.scene, 'space_value_prop', text="Spacing Value", icon='ARROW_LEFTRIGHT')
+
+        # Add the new axis toggle
+        layout.prop(context.scene, 'spacing_axis', text="Spacing Axis")
+
+        layout.prop(context.scene, 'spacing_mode', text="Mode")
+        if context.scene.spacing_mode == 'LAYER':
+            layout.operator("object.adjust_spacing", text="Set Layer Spacing", icon='MODIFIER')
+        else:
+            layout.operator("object.adjust_spacing", text="Adjust Spacing", icon='MODIFIER')
+        if context.object is not None and context.object.type == 'ARMATURE' and get_spacing_layer(context.object) is not None:
+            row = layout.row(align=True)
+            row.operator("object.apply_spacing_layer", text="Apply Layer", icon='CHECKMARK')
+            row.operator("object.remove_spacing_layer", text="Remove Layer", icon='X')
+
+        # Spacing profiles
+        box = layout.box()
+        box.label(text="Spacing Profiles", icon='PRESET')
+        row = box.row()
+        row.template_list("UI_UL_list", "spacing_profiles", context.scene, "spacing_profiles", context.scene, "active_spacing_profile_index", rows=2)
+        col = row.column(align=True)
+        col.operator("object.add_spacing_profile", text="", icon='ADD')
+        col.operator("object.remove_spacing_profile", text="", icon='REMOVE')
+        col.separator()
+        col.operator("object.import_spacing_profile", text="", icon='IMPORT')
+        col.operator("object.export_spacing_profile", text="", icon='EXPORT')
+
+        profile = get_active_spacing_profile(context.scene)
+        if profile is not None:
+            for index, entry in enumerate(profile.entries):
+                row = box.row(align=True)
+                row.prop(entry, "bone_pair", text="")
+                row.prop(entry, "space_value", text="")
+                row.prop(entry, "axis", text="")
+                row.prop(entry, "affect_left", text="", icon='TRIA_LEFT')
+                row.prop(entry, "affect_right", text="", icon='TRIA_RIGHT')
+                row.operator("object.remove_spacing_profile_entry", text="", icon='X').index = index
+            box.operator("object.add_spacing_profile_entry", text="Add Current Spacing", icon='ADD')
+            box.operator("object.apply_spacing_profile", text="Apply Spacing Profile", icon='MODIFIER')
+
+        layout.separator(factor=0.5)
+
+        # ------------------- Animation Helper Section -------------------
+        layout.label(text="Animation Helper", icon='ANIM')
+
+        row = layout.row(align=True)
+        row.operator("object.select_physics_bones", text="Select Physics Bones", icon='BONE_DATA')
+        row.operator("object.delete_highlighted_bones", text="Delete Highlighted Bones", icon='TRASH')
+        if context.object is not None and context.object.type == 'ARMATURE':
+            layout.prop(context.object.data, "physics_bone_pattern", text="Physics Names")
+            layout.prop(context.object.data, "physics_bone_exclude", text="Except")
+
+        # Toggle button for VRM spring bone physics with status indicator
+        layout.separator(factor=0.5)
+        is_enabled = context.scene.vrm_spring_bone_physics_enabled
+        icon = 'CHECKBOX_HLT' if is_enabled else 'CHECKBOX_DEHLT'
+        status_text = "VRM Spring Bone Physics ON" if is_enabled else "VRM Spring Bone Physics OFF"
+        layout.operator("object.toggle_vrm_spring_bone_physics", text=status_text, icon=icon)
+
+        layout.separator(factor=0.5)
+
+        # Adjust Playback and Bake
+        layout.prop(context.scene, "bake_engine", text="Bake Engine")
+        if context.scene.bake_engine == 'VISUAL_KEYING':
+            layout.prop(context.scene, "bake_physics_only", text="Physics Bones Only")
+        layout.operator("object.adjust_playback_and_bake", text="Adjust Playback & Bake", icon='RENDER_ANIMATION')
+        row = layout.row(align=True)
+        row.prop(context.scene, "use_bake_cache", text="Bake Cache")
+        sub = row.row(align=True)
+        sub.enabled = context.scene.use_bake_cache
+        sub.prop(context.scene, "bake_cache_size", text="MB")
+        if context.scene.use_bake_cache:
+            layout.prop(context.scene, "bake_cache_dir", text="")
+        row = layout.row(align=True)
+        row.enabled = incremental_bake_supported(context.scene)
+        row.prop(context.scene, "use_incremental_bake", text="Incremental")
+        sub = row.row(align=True)
+        sub.enabled = context.scene.use_incremental_bake and context.scene.bake_engine == 'VISUAL_KEYING'
+        sub.prop(context.scene, "bake_warmup_frames", text="Warm-up")
+        row = layout.row(align=True)
+        row.prop(context.scene, "bake_window_size", text="Window")
+        row.operator("object.modal_bake", text="Bake with Progress", icon='SORTTIME')
+        if ModalBakeOperator.running:
+            row = layout.row()
+            row.enabled = False
+            row.prop(context.scene, "bake_progress", text="Baking", slider=True)
+            layout.label(text=f"{context.scene.bake_progress_status} (Esc to stop)")
+
+        # Loopify Physics
+        layout.separator(factor=0.5)
+        layout.prop(context.scene, "frame_selection", text="Frame Selection", icon='TIME')
+        if context.scene.frame_selection == 'CUSTOM_FRAMES':
+            row = layout.row(align=True)
+            row.prop(context.scene, "loopify_copy_frame", text="Copy")
+            row.prop(context.scene, "loopify_paste_frame", text="Paste")
+        layout.prop(context.scene, "loopify_frame_easing", text="Frame Easing", icon='IPO_ELASTIC')
+        row = layout.row(align=True)
+        row.prop(context.scene, "loopify_seam_mode", text="")
+        if context.scene.loopify_seam_mode == 'CROSSFADE':
+            row.prop(context.scene, "loopify_blend_curve", text="")
+        layout.operator("object.loopify_physics", text="Loopify Physics", icon='CON_FOLLOWPATH')
+        row = layout.row(align=True)
+        row.prop(context.scene, "loop_search_window", text="Search")
+        row.operator("object.find_loop_point", text="Find Loop Point", icon='VIEWZOOM')
+
+        # Keyframe Reduction
+        layout.separator(factor=0.5)
+        row = layout.row(align=True)
+        row.prop(context.scene, "reduce_angle_tolerance", text="Angle")
+        row.prop(context.scene, "reduce_value_tolerance", text="Location/Scale")
+        layout.operator("object.reduce_physics_keys", text="Reduce Baked Keys", icon='IPO_LINEAR')
+
+        # ------------------- Apply to All Section -------------------
+        layout.separator(factor=0.5)
+        box = layout.box()
+        box.label(text="Apply to All Selected Armatures", icon='OUTLINER_OB_ARMATURE')
+        box.prop(context.scene, "apply_all_action_scope", text="Actions")
+        if context.scene.apply_all_action_scope == 'CHOSEN':
+            col = box.column(align=True)
+            for action in bpy.data.actions:
+                col.prop(action, "vrm_apply_all", text=action.name)
+        grid = box.grid_flow(columns=2, align=True)
+        grid.operator("object.apply_to_all", text="Spacing", icon='MODIFIER').task = 'SPACING'
+        grid.operator("object.apply_to_all", text="Delete Bones", icon='TRASH').task = 'DELETE'
+        grid.operator("object.apply_to_all", text="Bake", icon='RENDER_ANIMATION').task = 'BAKE'
+        grid.operator("object.apply_to_all", text="Loopify", icon='CON_FOLLOWPATH').task = 'LOOPIFY'
+
+        # ------------------- Operator Stats Section -------------------
+        layout.separator(factor=0.5)
+        box = layout.box()
+        scene = context.scene
+        box.prop(scene, "show_operator_stats", text="Operator Stats", icon='TRIA_DOWN' if scene.show_operator_stats else 'TRIA_RIGHT', emboss=False)
+        if scene.show_operator_stats:
+            box.prop(scene, "operator_log_path", text="Log File")
+            if not operator_run_history:
+                box.label(text="No operator has run yet.")
+            for record in list(operator_run_history)[:5]:
+                col = box.column(align=True)
+                col.label(text=f"{record['label']}: {record['seconds']:.3f}s ({', '.join(record['result'])})", icon='TIME')
+                for phase, seconds in record["phases"].items():
+                    col.label(text=f"    {phase}: {seconds:.3f}s")
+                counters = ", ".join(f"{name.replace('_', ' ')} {value}" for name, value in record["counters"].items() if value)
+                if counters:
+                    col.label(text=f"    {counters}")
+
+# ----------------------------- Batch Pipeline (Command Line) -----------------------------
+# Run headless with: blender -b -P vrm_spacing_animation_baking.py -- --manifest clips.json [--workers N] [--summary out.json]
+# Each clip is processed in its own background Blender process, N at a time.
+
+# Pipeline steps a clip runs when the manifest doesn't list its own
+batch_default_steps = ["select_physics_bones", "delete_highlighted_bones", "spring_physics_on", "bake", "loopify", "spring_physics_off"]
+
+# Steps that map straight onto an operator of this add-on
+batch_step_operators = {
+    "select_physics_bones": "select_physics_bones",
+    "delete_highlighted_bones": "delete_highlighted_bones",
+    "bake": "adjust_playback_and_bake",
+    "loopify": "loopify_physics",
+    "find_loop_point": "find_loop_point",
+    "reduce_keys": "reduce_physics_keys",
+    "apply_spacing_profile": "apply_spacing_profile",
+    "apply_spacing_layer": "apply_spacing_layer"
+}
+
+# Clip entries holding file paths, resolved relative to the manifest
+batch_path_keys = ("blend", "vrm", "action_blend", "output", "spacing_profile")
+
+# Seconds a clip's Blender process may run before it is stopped and the clip counted as failed, unless the clip (or the
+# manifest's defaults) sets its own "timeout"; null lets it run for as long as it takes
+batch_clip_timeout = 3600
+
+
+def get_batch_armature(clip):
+    if clip.get("armature"):
+        return bpy.data.objects[clip["armature"]]
+    return next(obj for obj in bpy.context.scene.objects if obj.type == 'ARMATURE')
+
+
+# Opens the clip's .blend file, or imports its VRM model and appends its action, and returns the armature.
+def load_batch_clip(clip):
+    if clip.get("blend"):
+        bpy.ops.wm.open_mainfile(filepath=clip["blend"])
+    else:
+        bpy.ops.wm.read_homefile(use_empty=True)
+        bpy.ops.import_scene.vrm(filepath=clip["vrm"])
+
+    armature = get_batch_armature(clip)
+
+    action = None
+    if clip.get("action_blend"):
+        with bpy.data.libraries.load(clip["action_blend"]) as (data_from, data_to):
+            data_to.actions = [clip["action"]]
+        action = data_to.actions[0]
+    elif clip.get("action"):
+        action = bpy.data.actions[clip["action"]]
+
+    if action is not None:
+        if armature.animation_data is None:
+            armature.animation_data_create()
+        armature.animation_data.action = action
+
+    return armature
+
+
+def set_batch_spring_physics(armature, enabled):
+    spring_bone1 = armature.data.vrm_addon_extension.spring_bone1
+    if spring_bone1.enable_animation == enabled:
+        return {'FINISHED'}
+    return bpy.ops.object.toggle_vrm_spring_bone_physics()
+
+
+def run_batch_step(step, armature, clip):
+    bpy.context.view_layer.objects.active = armature
+    armature.select_set(True)
+
+    if step == "spring_physics_on":
+        return set_batch_spring_physics(armature, True)
+    if step == "spring_physics_off":
+        return set_batch_spring_physics(armature, False)
+    if step == "spacing_profile":
+        bpy.ops.object.import_spacing_profile(filepath=clip["spacing_profile"])
+        return bpy.ops.object.apply_spacing_profile()
+    if step in batch_step_operators:
+        return getattr(bpy.ops.object, batch_step_operators[step])()
+    raise ValueError(f"Unknown batch step '{step}'")
+
+
+# Runs the pipeline on one clip inside this Blender process and returns its result summary.
+def run_batch_clip(clip):
+    result = {"name": clip["name"], "status": 'FAILED', "steps": [], "output": clip["output"]}
+    clip_start = time.perf_counter()
+    operator_run_history.clear()
+
+    # The batch runner reports every failure in the summary instead of stopping the whole library
+    try:
+        armature = load_batch_clip(clip)
+        scene = bpy.context.scene
+        for key, value in clip.get("scene", {}).items():
+            setattr(scene, key, value)
+
+        for step in clip.get("steps", batch_default_steps):
+            step_start = time.perf_counter()
+            outcome = run_batch_step(step, armature, clip)
+            result["steps"].append({"step": step, "result": sorted(outcome), "seconds": time.perf_counter() - step_start})
+            if 'FINISHED' not in outcome:
+                raise RuntimeError(f"Step '{step}' returned {sorted(outcome)}")
+
+        os.makedirs(os.path.dirname(clip["output"]), exist_ok=True)
+        bpy.ops.wm.save_as_mainfile(filepath=clip["output"], copy=True)
+        result["status"] = 'FINISHED'
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    result["seconds"] = time.perf_counter() - clip_start
+    result["operators"] = list(reversed(operator_run_history))
+    return result
+
+
+# Lists the clips of a manifest with defaults merged in and paths made absolute.
+def expand_batch_clips(manifest, base_dir):
+    defaults = manifest.get("defaults", {})
+    output_dir = os.path.join(base_dir, manifest.get("output_dir", "baked"))
+    clips = [dict(defaults, **clip) for clip in manifest.get("clips", [])]
+
+    # One VRM model plus a directory of .blend files, each action inside being its own clip
+    if manifest.get("vrm") and manifest.get("actions_dir"):
+        actions_dir = os.path.join(base_dir, manifest["actions_dir"])
+        for file_name in sorted(os.listdir(actions_dir)):
+            if not file_name.lower().endswith(".blend"):
+                continue
+            action_blend = os.path.join(actions_dir, file_name)
+            with bpy.data.libraries.load(action_blend) as (data_from, data_to):
+                action_names = list(data_from.actions)
+            for action_name in action_names:
+                clips.append(dict(defaults, vrm=manifest["vrm"], action_blend=action_blend, action=action_name))
+
+    for clip in clips:
+        for key in batch_path_keys:
+            if clip.get(key):
+                clip[key] = os.path.join(base_dir, clip[key])
+        if not clip.get("name"):
+            source = clip.get("blend") or clip.get("action_blend") or clip["vrm"]
+            clip["name"] = bpy.path.display_name_from_filepath(source)
+            if clip.get("action"):
+                clip["name"] += f"_{clip['action']}"
+        if not clip.get("output"):
+            clip["output"] = os.path.join(output_dir, f"{bpy.path.clean_name(clip['name'])}.blend")
+
+    return clips
+
+
+# Python run by each clip's background Blender process. The add-on is a package, so instead of running one of its files
+# as a script the worker loads it from the folder it was loaded from here, installed or not, without touching sys.path.
+def batch_worker_expression():
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    return ("import importlib.util, sys; "
+            f"spec = importlib.util.spec_from_file_location({__name__!r}, {os.path.join(package_dir, '__init__.py')!r}, "
+            f"submodule_search_locations=[{package_dir!r}]); "
+            "addon = sys.modules[spec.name] = importlib.util.module_from_spec(spec); spec.loader.exec_module(addon); "
+            "sys.exit(addon.batch_main(sys.argv[sys.argv.index('--') + 1:]))")
+
+
+# Runs one clip in a fresh background Blender process and reads back its result summary.
+def run_batch_worker(blender_binary, clip):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        result_path = os.path.join(temp_dir, "result.json")
+        command = [blender_binary, "-b", "--python-expr", batch_worker_expression(), "--", "--clip", json.dumps(clip),
+                   "--result", result_path]
+        timeout = clip.get("timeout", batch_clip_timeout)
+        try:
+            process = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired as error:
+            # The process was killed, so whatever result it may have written is incomplete
+            log = error.stderr.decode("utf-8", "replace") if isinstance(error.stderr, bytes) else error.stderr or ""
+            return {
+                "name": clip["name"],
+                "status": 'FAILED',
+                "error": f"Timed out after {timeout} seconds",
+                "log": log[-2000:]
+            }
+        except OSError as error:
+            # Blender couldn't be started at all, e.g. a wrong "blender" path in the manifest
+            return {
+                "name": clip["name"],
+                "status": 'FAILED',
+                "error": f"Could not start {blender_binary}: {error}",
+                "log": ""
+            }
+
+        if os.path.exists(result_path):
+            with open(result_path, encoding="utf-8") as result_file:
+                return json.load(result_file)
+
+    return {
+        "name": clip["name"],
+        "status": 'FAILED',
+        "error": f"Blender exited with code {process.returncode} before writing a result",
+        "log": process.stderr[-2000:]
+    }
+
+
+# Spreads the clips of a manifest across background Blender processes and writes the combined summary.
+def run_batch_manifest(manifest_path, workers=None, summary_path=None):
+    manifest_path = os.path.abspath(manifest_path)
+    with open(manifest_path, encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+
+    base_dir = os.path.dirname(manifest_path)
+    clips = expand_batch_clips(manifest, base_dir)
+    blender_binary = manifest.get("blender") or bpy.app.binary_path
+    workers = workers or manifest.get("workers") or os.cpu_count() or 1
+    summary_path = summary_path or os.path.join(base_dir, "batch_summary.json")
+
+    batch_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda clip: run_batch_worker(blender_binary, clip), clips))
+
+    failed = [result["name"] for result in results if result["status"] != 'FINISHED']
+    summary = {
+        "manifest": manifest_path,
+        "workers": workers,
+        "clips": len(results),
+        "failed": failed,
+        "seconds": time.perf_counter() - batch_start,
+        "results": results
+    }
+    with open(summary_path, "w", encoding="utf-8") as summary_file:
+        json.dump(summary, summary_file, indent=4)
+
+    print(f"Batch finished: {len(results) - len(failed)}/{len(results)} clips baked, summary written to {summary_path}")
+    return 1 if failed else 0
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(prog="blender -b -P batch.py --", description="Headless VRM physics baking pipeline.")
+    parser.add_argument("--manifest", help="JSON manifest listing the clips to process")
+    parser.add_argument("--workers", type=int, help="Number of background Blender processes (defaults to one per core)")
+    parser.add_argument("--summary", help="Where to write the per-clip result summary")
+    parser.add_argument("--clip", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Worker mode: a single clip, run in this process
+    if args.clip:
+        if not hasattr(bpy.types, "OBJECT_OT_loopify_physics"):
+            register()
+        result = run_batch_clip(json.loads(args.clip))
+        with open(args.result, "w", encoding="utf-8") as result_file:
+            json.dump(result, result_file, indent=4)
+        return 0 if result["status"] == 'FINISHED' else 1
+
+    if not args.manifest:
+        parser.error("--manifest is required")
+    return run_batch_manifest(args.manifest, args.workers, args.summary)
+
+# ----------------------------- Register/Unregister Functions -----------------------------
+
+def register():
+    bpy.utils.register_class(SpacingAdjusterOperator)
+    bpy.utils.register_class(ApplySpacingLayerOperator)
+    bpy.utils.register_class(RemoveSpacingLayerOperator)
+    bpy.utils.register_class(SpacingProfileEntry)
+    bpy.utils.register_class(SpacingProfile)
+    bpy.utils.register_class(AddSpacingProfileOperator)
+    bpy.utils.register_class(RemoveSpacingProfileOperator)
+    bpy.utils.register_class(AddSpacingProfileEntryOperator)
+    bpy.utils.register_class(RemoveSpacingProfileEntryOperator)
+    bpy.utils.register_class(ApplySpacingProfileOperator)
+    bpy.utils.register_class(ExportSpacingProfileOperator)
+    bpy.utils.register_class(ImportSpacingProfileOperator)
+    bpy.utils.register_class(SelectPhysicsBonesOperator)
+    bpy.utils.register_class(DeleteHighlightedBonesOperator)
+    bpy.utils.register_class(SpacingPanel)
+    bpy.utils.register_class(AdjustPlaybackAndBakeOperator)
+    bpy.utils.register_class(ModalBakeOperator)
+    bpy.utils.register_class(ToggleVRMSpringBonePhysicsOperator)
+    bpy.utils.register_class(LoopifyPhysicsOperator)
+    bpy.utils.register_class(FindLoopPointOperator)
+    bpy.utils.register_class(ApplyToAllOperator)
+    bpy.utils.register_class(ReducePhysicsKeysOperator)
+
+    bpy.types.Scene.selected_bone_pair = bpy.props.EnumProperty(
+        name="Bone Pair",
+        description="Select the bone pair to adjust",
+        items=[(bp[0], bp[3], "") for bp in bone_pairs],
+        default='SHOULDER',
+        update=sync_spacing_layer_value
+    )
+
+    bpy.types.Scene.affect_left_prop = bpy.props.BoolProperty(
+        name="Affect Left",
+        description="Affect the left bone",
+        default=True
+    )
+    bpy.types.Scene.affect_right_prop = bpy.props.BoolProperty(
+        name="Affect Right",
+        description="Affect the right bone",
+        default=True
+    )
+    bpy.types.Scene.space_value_prop = bpy.props.FloatProperty(
+        name="Spacing Value",
+        description="Spacing value in degrees",
+        default=5.0,
+        min=-20.0,
+        max=20.0,
+        update=update_spacing_layer_value
+    )
+    bpy.types.Scene.spacing_axis = bpy.props.EnumProperty(
+        name="Spacing Axis",
+        description="Choose which axis to apply the spacing on",
+        items=spacing_axis_items,
+        default='SIDEWAYS',
+        update=sync_spacing_layer_value
+    )
+    bpy.types.Scene.spacing_mode = bpy.props.EnumProperty(
+        name="Spacing Mode",
+        description="Where the spacing is applied",
+        items=[('ACTION', "Adjust Keys", "Add the spacing value to the animation's keys on every click"),
+               ('LAYER', "Spacing Layer", "Keep the spacing in a layer over the animation, updated live with the slider, until it is applied")],
+        default='ACTION',
+        update=sync_spacing_layer_value
+    )
+
+    bpy.types.Scene.spacing_profiles = bpy.props.CollectionProperty(type=SpacingProfile)
+    bpy.types.Scene.active_spacing_profile_index = bpy.props.IntProperty(
+        name="Active Spacing Profile",
+        default=0
+    )
+
+    bpy.types.Scene.bake_engine = bpy.props.EnumProperty(
+        name="Bake Engine",
+        description="How Adjust Playback & Bake records the spring bone physics",
+        items=[('VISUAL_KEYING', "Visual Keying", "Steps through the scene and keys every bone as the VRM add-on moves it"),
+               ('SPRING_SIMULATION', "Spring Simulation", "Simulates the VRM spring bone chains with NumPy and keys only the joints, without stepping through the scene")],
+        default='VISUAL_KEYING'
+    )
+
+    bpy.types.Scene.bake_physics_only = bpy.props.BoolProperty(
+        name="Physics Bones Only",
+        description="Bake only the physics bones (the VRM spring bone joints, or the bones Select Physics Bones picks) and keep the body's original keys",
+        default=False
+    )
+
+    bpy.types.Scene.use_bake_cache = bpy.props.BoolProperty(
+        name="Bake Cache",
+        description="Restore the physics of a clip whose body animation, spacing, spring bones and bake settings haven't changed since it was last baked, instead of baking it again",
+        default=False
+    )
+    bpy.types.Scene.bake_cache_dir = bpy.props.StringProperty(
+        name="Bake Cache Directory",
+        description="Directory of the bake cache; the system's temporary directory when empty",
+        subtype='DIR_PATH',
+        default=""
+    )
+    bpy.types.Scene.bake_cache_size = bpy.props.IntProperty(
+        name="Bake Cache Size",
+        description="Size limit of the bake cache in megabytes; the least recently used bakes are removed past it",
+        default=512,
+        min=1
+    )
+    bpy.types.Scene.use_incremental_bake = bpy.props.BoolProperty(
+        name="Incremental Bake",
+        description="Re-bake only the frames reached by the keys edited since the action's last bake in this session, splicing the new physics keys in. Needs the Spring Simulation engine or Physics Bones Only",
+        default=False
+    )
+    bpy.types.Scene.bake_warmup_frames = bpy.props.IntProperty(
+        name="Warm-up Frames",
+        description="Frames the Visual Keying bake plays before an edited range, and keeps keying after it, so the spring bones settle into the motion",
+        default=30,
+        min=0
+    )
+    bpy.types.Scene.bake_window_size = bpy.props.IntProperty(
+        name="Bake Window",
+        description="Frames baked per step by Bake with Progress; smaller windows update the progress more often",
+        default=250,
+        min=1
+    )
+    bpy.types.Scene.bake_progress = bpy.props.FloatProperty(
+        name="Bake Progress",
+        subtype='PERCENTAGE',
+        min=0.0,
+        max=100.0
+    )
+    bpy.types.Scene.bake_progress_status = bpy.props.StringProperty(name="Bake Status")
+
+    bpy.types.Scene.frame_selection = bpy.props.EnumProperty(
+        name="Frame Selection",
+        description="Choose the frame to base the loop from",
+        items=[('LAST_FRAME', "Last Frame (Recommended)", ""),
+               ('FIRST_FRAME', "First Frame", ""),
+               ('CUSTOM_FRAMES', "Custom Frames", "Copy and paste at the frames below, as found by Find Loop Point")],
+        default='LAST_FRAME'
+    )
+
+    bpy.types.Scene.loopify_frame_easing = bpy.props.IntProperty(
+        name="Frame Easing from Loop",
+        description="Number of frames to ease out physics when looping",
+        default=4
+    )
+    bpy.types.Scene.loopify_seam_mode = bpy.props.EnumProperty(
+        name="Seam",
+        description="How Loopify joins the end of the loop to its start",
+        items=[('INTERPOLATE', "Delete & Interpolate", "Delete the frame easing keys and let the curve interpolate to the pasted key"),
+               ('CROSSFADE', "Crossfade", "Keep every baked key and blend the frame easing keys toward the other end's motion")],
+        default='INTERPOLATE'
+    )
+    bpy.types.Scene.loopify_blend_curve = bpy.props.EnumProperty(
+        name="Blend Curve",
+        description="Weight curve of the crossfade over the frame easing",
+        items=[('SMOOTHSTEP', "Smoothstep", ""),
+               ('COSINE', "Cosine", "")],
+        default='SMOOTHSTEP'
+    )
+    bpy.types.Scene.loopify_copy_frame = bpy.props.IntProperty(
+        name="Copy Frame",
+        description="Frame whose physics pose is copied to the paste frame"
+    )
+    bpy.types.Scene.loopify_paste_frame = bpy.props.IntProperty(
+        name="Paste Frame",
+        description="Frame the copied physics pose is pasted at; the frame easing runs from the copy frame's side"
+    )
+    bpy.types.Scene.loop_search_window = bpy.props.IntProperty(
+        name="Loop Search Window",
+        description="How many frames from each end of the animation Find Loop Point considers as loop points",
+        default=30,
+        min=2
+    )
+
+    bpy.types.Scene.reduce_angle_tolerance = bpy.props.FloatProperty(
+        name="Angle Tolerance",
+        description="How far a rotation may drift from the baked one when its keys are reduced",
+        subtype='ANGLE',
+        default=math.radians(0.5),
+        min=0.0
+    )
+    bpy.types.Scene.reduce_value_tolerance = bpy.props.FloatProperty(
+        name="Location/Scale Tolerance",
+        description="How far a location or scale may drift from the baked one when its keys are reduced",
+        default=0.001,
+        min=0.0,
+        precision=4
+    )
+
+    bpy.types.Scene.apply_all_action_scope = bpy.props.EnumProperty(
+        name="Apply to All Actions",
+        description="Which actions Apply to All works on for each selected armature",
+        items=[('ACTIVE', "Current Actions", "Each selected armature's current action"),
+               ('CHOSEN', "Ticked Actions", "Every action ticked below that keys the armature's bones")],
+        default='ACTIVE'
+    )
+    bpy.types.Action.vrm_apply_all = bpy.props.BoolProperty(
+        name="Apply to All",
+        description="Include this action when applying to all",
+        default=False
+    )
+    bpy.types.Armature.physics_bone_pattern = bpy.props.StringProperty(
+        name="Physics Bone Pattern",
+        description="Regular expression of the physics bone names, used when the armature has no VRM spring bones",
+        default=physics_bone_pattern_default
+    )
+    bpy.types.Armature.physics_bone_exclude = bpy.props.StringProperty(
+        name="Physics Bone Exclusions",
+        description="Regular expression of bone names that are never physics bones, even when they match the pattern",
+        default=""
+    )
+
+    bpy.types.Scene.show_operator_stats = bpy.props.BoolProperty(
+        name="Show Operator Stats",
+        description="Show the timings and counters of the last operators run",
+        default=False
+    )
+    bpy.types.Scene.operator_log_path = bpy.props.StringProperty(
+        name="Operator Log",
+        description="Optional JSON-lines file every operator run is appended to",
+        subtype='FILE_PATH',
+        default=""
+    )
+
+    bpy.types.Scene.vrm_spring_bone_physics_enabled = bpy.props.BoolProperty(
+        name="VRM Spring Bone Physics",
+        description="Toggle VRM Spring Bone Physics ON/OFF",
+        default=False
+    )
+
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(clear_action_fcurve_indices)
+        handlers.append(clear_bake_snapshots)
+        handlers.append(clear_spring_chain_indices)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_spring_chain_indices)
+
+
+def unregister():
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        for handler in (clear_action_fcurve_indices, clear_bake_snapshots, clear_spring_chain_indices):
+            if handler in handlers:
+                handlers.remove(handler)
+    if invalidate_spring_chain_indices in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(invalidate_spring_chain_indices)
+    invalidate_action_fcurve_index()
+    bake_snapshots.clear()
+    spring_chain_indices.clear()
+
+    bpy.utils.unregister_class(SpacingAdjusterOperator)
+    bpy.utils.unregister_class(ApplySpacingLayerOperator)
+    bpy.utils.unregister_class(RemoveSpacingLayerOperator)
+    bpy.utils.unregister_class(ImportSpacingProfileOperator)
+    bpy.utils.unregister_class(ExportSpacingProfileOperator)
+    bpy.utils.unregister_class(ApplySpacingProfileOperator)
+    bpy.utils.unregister_class(RemoveSpacingProfileEntryOperator)
+    bpy.utils.unregister_class(AddSpacingProfileEntryOperator)
+    bpy.utils.unregister_class(RemoveSpacingProfileOperator)
+    bpy.utils.unregister_class(AddSpacingProfileOperator)
+    bpy.utils.unregister_class(SelectPhysicsBonesOperator)
+    bpy.utils.unregister_class(DeleteHighlightedBonesOperator)
+    bpy.utils.unregister_class(SpacingPanel)
+    bpy.utils.unregister_class(AdjustPlaybackAndBakeOperator)
+    bpy.utils.unregister_class(ModalBakeOperator)
+    bpy.utils.unregister_class(ToggleVRMSpringBonePhysicsOperator)
+    bpy.utils.unregister_class(LoopifyPhysicsOperator)
+    bpy.utils.unregister_class(FindLoopPointOperator)
+    bpy.utils.unregister_class(ApplyToAllOperator)
+    bpy.utils.unregister_class(ReducePhysicsKeysOperator)
+
+    del bpy.types.Scene.selected_bone_pair
+    del bpy.types.Scene.affect_left_prop
+    del bpy.types.Scene.affect_right_prop
+    del bpy.types.Scene.space_value_prop
+    del bpy.types.Scene.spacing_axis
+    del bpy.types.Scene.spacing_mode
+    del bpy.types.Scene.bake_engine
+    del bpy.types.Scene.bake_physics_only
+    del bpy.types.Scene.use_bake_cache
+    del bpy.types.Scene.bake_cache_dir
+    del bpy.types.Scene.bake_cache_size
+    del bpy.types.Scene.use_incremental_bake
+    del bpy.types.Scene.bake_warmup_frames
+    del bpy.types.Scene.bake_window_size
+    del bpy.types.Scene.bake_progress
+    del bpy.types.Scene.bake_progress_status
+    del bpy.types.Scene.frame_selection
+    del bpy.types.Scene.loopify_frame_easing
+    del bpy.types.Scene.loopify_seam_mode
+    del bpy.types.Scene.loopify_blend_curve
+    del bpy.types.Scene.loopify_copy_frame
+    del bpy.types.Scene.loopify_paste_frame
+    del bpy.types.Scene.loop_search_window
+    del bpy.types.Scene.reduce_angle_tolerance
+    del bpy.types.Scene.reduce_value_tolerance
+    del bpy.types.Scene.apply_all_action_scope
+    del bpy.types.Action.vrm_apply_all
+    del bpy.types.Armature.physics_bone_pattern
+    del bpy.types.Armature.physics_bone_exclude
+    del bpy.types.Scene.show_operator_stats
+    del bpy.types.Scene.operator_log_path
+    del bpy.types.Scene.vrm_spring_bone_physics_enabled
+    del bpy.types.Scene.spacing_profiles
+    del bpy.types.Scene.active_spacing_profile_index
+
+    bpy.utils.unregister_class(SpacingProfile)
+    bpy.utils.unregister_class(SpacingProfileEntry)
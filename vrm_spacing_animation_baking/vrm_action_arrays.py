@@ -0,0 +1,638 @@
+# NumPy side of VRM-Spacing-Animation-Baking: key tables, rotations and the ActionArrays model of an action's F-Curves,
+# with the pure Spacing, Delete, Loopify and key reduction functions over it, and the hash that keys the bake cache.
+# Nothing here imports Blender, so it runs (and is tested) with plain Python and NumPy; the add-on moves the curves of
+# Blender actions in and out of these arrays in bulk.
+
+import hashlib
+import json
+import math
+import re
+import numpy as np
+
+
+# ----------------------------- Key Tables -----------------------------
+
+# Per-key attributes carried over when an F-Curve is rewritten in bulk, with their number of components
+keyframe_float_attributes = (("co", 2), ("handle_left", 2), ("handle_right", 2), ("amplitude", 1), ("back", 1), ("period", 1))
+keyframe_enum_attributes = ("interpolation", "easing", "handle_left_type", "handle_right_type", "type")
+
+
+# Enum values written for freshly generated keys: Bezier interpolation, automatic easing, auto clamped handles, regular keyframe
+new_keyframe_enum_values = {"interpolation": 2, "easing": 0, "handle_left_type": 4, "handle_right_type": 4, "type": 0}
+
+
+# Builds a key table for sampled values, one key per frame, with handles left for fcurve.update() to recalculate.
+def sampled_keyframe_table(frames, values):
+    count = len(frames)
+    co = np.stack([np.asarray(frames, dtype=np.float32), np.asarray(values, dtype=np.float32)], axis=1)
+    table = {"co": co, "handle_left": co.copy(), "handle_right": co.copy()}
+    table["amplitude"] = np.full(count, 0.8, dtype=np.float32)
+    table["back"] = np.full(count, 1.70158, dtype=np.float32)
+    table["period"] = np.full(count, 4.1, dtype=np.float32)
+    for name, value in new_keyframe_enum_values.items():
+        table[name] = np.full(count, value, dtype=np.int32)
+    return table
+
+
+# Swaps the keys of a table inside the frame span of new_table for the new keys, keeping the keys outside it.
+def replace_keyframe_range(table, new_table):
+    new_frames = new_table["co"][:, 0]
+    if len(new_frames) == 0:
+        return table
+    frames = table["co"][:, 0]
+    keep = (frames < new_frames[0]) | (frames > new_frames[-1])
+    merged = {name: np.concatenate([values[keep], new_table[name]]) for name, values in table.items()}
+    order = np.argsort(merged["co"][:, 0], kind="stable")
+    return {name: values[order] for name, values in merged.items()}
+
+
+# Evaluates a key table at the frames like FCurve.evaluate does, without Blender: constant, linear and Bezier segments
+# (the easing interpolations are read as Bezier), with Blender's handle correction and constant extrapolation.
+def evaluate_keyframe_table(table, frames):
+    frames = np.asarray(frames, dtype=np.float64)
+    co = table["co"].astype(np.float64)
+    if len(co) < 2:
+        return np.full(len(frames), co[0, 1] if len(co) else 0.0)
+
+    segment = np.clip(np.searchsorted(co[:, 0], frames, side="right") - 1, 0, len(co) - 2)
+    p0, p3 = co[segment], co[segment + 1]
+    span = p3[:, 0] - p0[:, 0]
+    linear = p0[:, 1] + (p3[:, 1] - p0[:, 1]) * np.divide(frames - p0[:, 0], span, out=np.zeros(len(frames)), where=span != 0)
+
+    # Handles reaching past each other along the frames are scaled down together, so x(t) keeps increasing
+    p1 = table["handle_right"][segment].astype(np.float64)
+    p2 = table["handle_left"][segment + 1].astype(np.float64)
+    length_1 = np.maximum(p1[:, 0] - p0[:, 0], 0.0)
+    length_2 = np.maximum(p3[:, 0] - p2[:, 0], 0.0)
+    scale = np.divide(span, length_1 + length_2, out=np.ones(len(frames)), where=length_1 + length_2 > span)[:, None]
+    p1 = p0 + (p1 - p0) * scale
+    p2 = p3 - (p3 - p2) * scale
+
+    def bezier(t, axis):
+        u = 1.0 - t
+        return u * u * u * p0[:, axis] + 3.0 * u * u * t * p1[:, axis] + 3.0 * u * t * t * p2[:, axis] + t * t * t * p3[:, axis]
+
+    low = np.zeros(len(frames))
+    high = np.ones(len(frames))
+    for _ in range(40):
+        middle = (low + high) * 0.5
+        below = bezier(middle, 0) < frames
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    curved = bezier((low + high) * 0.5, 1)
+
+    interpolation = table["interpolation"][segment]
+    values = np.where(interpolation == 0, p0[:, 1], np.where(interpolation == 1, linear, curved))
+    values[frames <= co[0, 0]] = co[0, 1]
+    values[frames >= co[-1, 0]] = co[-1, 1]
+    return values
+
+
+# Marks the keys that sit exactly on a whole frame between frame_start and frame_end.
+def whole_frame_key_mask(frames, frame_start, frame_end):
+    return (frames == np.floor(frames)) & (frames >= frame_start) & (frames <= frame_end)
+
+
+# Adds each delta in turn to the masked float32 values, summing in double precision like a Python float would,
+# so a list of deltas lands on the same values as applying them one click at a time.
+def offset_values(values, mask, deltas):
+    shifted = values.copy()
+    for delta in deltas:
+        shifted[mask] = (shifted[mask].astype(np.float64) + delta).astype(np.float32)
+    return shifted
+
+
+# Offsets every whole-frame key of a key table in the given range by the deltas, handles included.
+# Returns the new table, or None when no key is in range, with the number of keys changed.
+def offset_keyframe_table(table, frame_start, frame_end, deltas):
+    mask = whole_frame_key_mask(table["co"][:, 0], frame_start, frame_end)
+    changed = int(np.count_nonzero(mask))
+    if changed == 0:
+        return None, 0
+    result = dict(table)
+    for name in ("co", "handle_left", "handle_right"):
+        result[name] = table[name].copy()
+        result[name][:, 1] = offset_values(table[name][:, 1], mask, deltas)
+    return result, changed
+
+
+# ----------------------------- Data Paths -----------------------------
+
+# Matches pose bone data paths like pose.bones["J_Sec_Hair1"].rotation_quaternion, allowing escaped quotes in the name
+pose_bone_data_path_pattern = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\]\.?(.*)$')
+
+
+# Splits a data path into its bone name and channel, or (None, None) for non-bone curves.
+def parse_pose_bone_data_path(data_path):
+    match = pose_bone_data_path_pattern.match(data_path)
+    if match is None:
+        return None, None
+    bone_name = match.group(1).replace('\\"', '"').replace('\\\\', '\\')
+    return bone_name, match.group(2)
+
+
+# ----------------------------- Rotations -----------------------------
+
+def normalize_vectors(vectors):
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(lengths, 1e-12)
+
+
+# (..., 4) W/X/Y/Z quaternions to (..., 3, 3) rotation matrices.
+def quaternion_to_matrix(quaternions):
+    w, x, y, z = np.moveaxis(normalize_vectors(quaternions), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1)
+    ], axis=-2)
+
+
+# Hamilton products of (..., 4) W/X/Y/Z quaternions, a then b.
+def multiply_quaternions(a, b):
+    aw, ax, ay, az = np.moveaxis(np.asarray(a, dtype=np.float64), -1, 0)
+    bw, bx, by, bz = np.moveaxis(np.asarray(b, dtype=np.float64), -1, 0)
+    return np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw
+    ], axis=-1)
+
+
+# (..., 3) Euler angles in a Blender rotation order like 'XYZ' to (..., 3, 3) rotation matrices.
+def euler_to_matrix(angles, order):
+    matrix = np.broadcast_to(np.eye(3), angles.shape[:-1] + (3, 3))
+    for axis_name in order:
+        axis = "XYZ".index(axis_name)
+        cos, sin = np.cos(angles[..., axis]), np.sin(angles[..., axis])
+        rotation = np.zeros(angles.shape[:-1] + (3, 3))
+        rotation[..., axis, axis] = 1.0
+        a, b = [i for i in range(3) if i != axis]
+        sign = -1.0 if axis == 1 else 1.0
+        rotation[..., a, a] = cos
+        rotation[..., b, b] = cos
+        rotation[..., a, b] = -sin * sign
+        rotation[..., b, a] = sin * sign
+        # Blender applies the first axis of the order first
+        matrix = rotation @ matrix
+    return matrix
+
+
+# (..., 4) angle/X/Y/Z axis-angle rotations to (..., 3, 3) rotation matrices.
+def axis_angle_to_matrix(axis_angles):
+    half = axis_angles[..., 0:1] / 2.0
+    return quaternion_to_matrix(np.concatenate([np.cos(half), normalize_vectors(axis_angles[..., 1:]) * np.sin(half)], axis=-1))
+
+
+# Shortest-arc quaternions rotating unit vectors a onto unit vectors b.
+def rotation_between(a, b):
+    dot = np.sum(a * b, axis=-1)
+    quaternions = np.concatenate([(1.0 + dot)[..., None], np.cross(a, b)], axis=-1)
+    # Opposite vectors: turn half a circle around any axis perpendicular to a
+    opposite = dot < -1.0 + 1e-9
+    if np.any(opposite):
+        helper = np.where(np.abs(a[opposite][:, 0:1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+        quaternions[opposite] = np.concatenate([np.zeros((helper.shape[0], 1)), normalize_vectors(np.cross(a[opposite], helper))], axis=-1)
+    return normalize_vectors(quaternions)
+
+
+# Flips quaternion signs so every key sits in the same hemisphere as the previous one, keeping interpolation from spinning.
+def make_quaternions_continuous(quaternions):
+    flips = np.sum(quaternions[1:] * quaternions[:-1], axis=-1) < 0.0
+    signs = np.cumprod(np.where(flips, -1.0, 1.0), axis=0)
+    quaternions = quaternions.copy()
+    quaternions[1:] *= signs[..., None]
+    return quaternions
+
+
+def compose_matrices(translation, rotation, scale):
+    matrix = np.zeros(translation.shape[:-1] + (4, 4))
+    matrix[..., :3, :3] = rotation * scale[..., None, :]
+    matrix[..., :3, 3] = translation
+    matrix[..., 3, 3] = 1.0
+    return matrix
+
+
+# Quaternion for spacing angles (X, Y, Z radians), composed like an XYZ Euler rotation (X first, Z last).
+def spacing_quaternion(angles):
+    quaternion = np.array([1.0, 0.0, 0.0, 0.0])
+    for axis, angle in enumerate(angles):
+        axis_quaternion = np.zeros(4)
+        axis_quaternion[0] = math.cos(angle / 2.0)
+        axis_quaternion[axis + 1] = math.sin(angle / 2.0)
+        quaternion = multiply_quaternions(axis_quaternion, quaternion)
+    return quaternion
+
+
+# Rotates every whole-frame key of a quaternion bone between frame_start and frame_end by the offset quaternion,
+# applied before the key's rotation (offset * q), so about the bone's rest axes, the same way the Spacing Layer's
+# quaternion keys combine with the clip. This is not quite what adding the angles to an XYZ Euler bone does: a Z delta
+# is also applied about the rest axis and matches exactly, but an X delta turns the bone about its own posed X axis,
+# and a Y delta about the Y axis after the X rotation. X and Y offsets match the Euler ones while the pose has no
+# rotation on the later axes (no Y or Z for X, no Z for Y), and otherwise differ by how far the pose is bent.
+# tables holds the key tables of the W/X/Y/Z curves, None for a missing curve,
+# which holds its component of rest (the bone's pose rotation). The keys are multiplied in one batch, kept in one
+# hemisphere so interpolation doesn't flip, and their handles moved along.
+# Returns the new table of each component (None where it is unchanged) and the number of keys changed.
+def rotate_quaternion_tables(tables, frame_start, frame_end, offset, rest=(1.0, 0.0, 0.0, 0.0)):
+    masks = [None if table is None or len(table["co"]) == 0 else whole_frame_key_mask(table["co"][:, 0], frame_start, frame_end) for table in tables]
+    keyed = [table["co"][mask, 0] for table, mask in zip(tables, masks) if mask is not None]
+    frames = np.unique(np.concatenate(keyed)) if keyed else np.zeros(0)
+    if len(frames) == 0:
+        return [None] * 4, 0
+
+    # Keys of all four curves usually share their frames; a component without a key on a frame is evaluated there
+    quaternions = np.empty((len(frames), 4))
+    for component, (table, mask) in enumerate(zip(tables, masks)):
+        if mask is None:
+            quaternions[:, component] = rest[component]
+            continue
+        keyed = np.zeros(len(frames), dtype=bool)
+        positions = np.searchsorted(frames, table["co"][mask, 0])
+        keyed[positions] = True
+        quaternions[positions, component] = table["co"][mask, 1]
+        quaternions[~keyed, component] = evaluate_keyframe_table(table, frames[~keyed])
+
+    rotated = make_quaternions_continuous(multiply_quaternions(offset, quaternions))
+    if np.dot(rotated[0], quaternions[0]) < 0.0:
+        rotated = -rotated
+
+    results = []
+    changed = 0
+    for component, (table, mask) in enumerate(zip(tables, masks)):
+        if mask is None:
+            # A missing curve only needs creating once the rotation stops leaving it at its constant value
+            changes = not np.allclose(rotated[:, component], quaternions[:, component])
+            results.append(sampled_keyframe_table(frames, rotated[:, component]) if changes else None)
+            continue
+        if not np.any(mask):
+            results.append(None)
+            continue
+        result = {name: values.copy() if name in ("co", "handle_left", "handle_right") else values for name, values in table.items()}
+        values = rotated[np.searchsorted(frames, table["co"][mask, 0]), component]
+        delta = values - table["co"][mask, 1]
+        result["co"][mask, 1] = values
+        result["handle_left"][mask, 1] += delta
+        result["handle_right"][mask, 1] += delta
+        results.append(result)
+        changed += int(np.count_nonzero(mask))
+    return results, changed
+
+
+# ----------------------------- Loopify -----------------------------
+
+# Loopifies one key table: drops the whole-frame keys in the delete range and pastes the copy frame's key at paste_frame.
+# Returns the new table with the number of keys removed and inserted.
+def loopify_keyframe_table(table, copy_frame, delete_range_start, delete_range_end, paste_frame):
+    frames = table["co"][:, 0]
+
+    # Keys are sorted by frame, so the copy frame is found with a binary search
+    copy_index = int(np.searchsorted(frames, copy_frame))
+    has_copy = copy_index < len(frames) and frames[copy_index] == copy_frame
+    source = {name: values[copy_index].copy() for name, values in table.items()} if has_copy else None
+
+    keep = ~whole_frame_key_mask(frames, delete_range_start, delete_range_end)
+    removed = len(frames) - int(np.count_nonzero(keep))
+    result = {name: values[keep] for name, values in table.items()}
+
+    # A paste frame inside the delete range is cleared again, as the delete step runs after the paste
+    inserted = 0
+    if has_copy and not delete_range_start <= paste_frame <= delete_range_end:
+        value = source["co"][1]
+        kept_frames = result["co"][:, 0]
+        paste_index = int(np.searchsorted(kept_frames, paste_frame))
+        if paste_index < len(kept_frames) and kept_frames[paste_index] == paste_frame:
+            # Overwrite the existing key, carrying its handles along like keyframe_points.insert does
+            delta = value - result["co"][paste_index, 1]
+            result["co"][paste_index, 1] = value
+            result["handle_left"][paste_index, 1] += delta
+            result["handle_right"][paste_index, 1] += delta
+        else:
+            shift = np.array([paste_frame - copy_frame, 0.0], dtype=np.float32)
+            source["co"] = source["co"] + shift
+            source["handle_left"] = source["handle_left"] + shift
+            source["handle_right"] = source["handle_right"] + shift
+            result = {name: np.insert(values, paste_index, source[name], axis=0) for name, values in result.items()}
+        inserted = 1
+
+    return result, removed, inserted
+
+
+# Crossfade weights over u in [0, 1]; both have zero slope at the ends, so the blend keeps the motion's velocity there
+seam_blend_weights = {
+    'SMOOTHSTEP': lambda u: u * u * (3.0 - 2.0 * u),
+    'COSINE': lambda u: 0.5 - 0.5 * np.cos(np.pi * u)
+}
+
+
+# Samples a key table's values at the frames, continuing past the first and last keys along their slope.
+def extrapolated_key_values(table, frames):
+    key_frames = table["co"][:, 0].astype(np.float64)
+    key_values = table["co"][:, 1].astype(np.float64)
+    values = np.interp(frames, key_frames, key_values)
+    if len(key_frames) > 1:
+        before = frames < key_frames[0]
+        after = frames > key_frames[-1]
+        values[before] += (frames[before] - key_frames[0]) * (key_values[1] - key_values[0]) / (key_frames[1] - key_frames[0])
+        values[after] += (frames[after] - key_frames[-1]) * (key_values[-1] - key_values[-2]) / (key_frames[-1] - key_frames[-2])
+    return values
+
+
+# Loopifies the key tables of one channel (one table, or the four of a quaternion) by crossfading instead of deleting:
+# the copy frame's key is pasted at paste_frame, and the keys in the easing window next to it are blended from their
+# baked values toward the opposite end's motion, lined up so it continues from the paste frame. Every simulated key
+# is kept, and the seam keeps both the position and the velocity of the motion across it.
+# Quaternions are blended component-wise on the same hemisphere and normalized, a normalized slerp.
+# Returns the new tables with the number of keys blended and inserted.
+def crossfade_keyframe_tables(tables, copy_frame, paste_frame, frame_easing, blend_curve):
+    if paste_frame > copy_frame:
+        window_start, window_end = paste_frame - frame_easing, paste_frame - 1
+    else:
+        window_start, window_end = paste_frame + 1, paste_frame + frame_easing
+
+    results = []
+    blends = []
+    inserted = 0
+    for table in tables:
+        # An empty delete range makes the Loopify rewrite paste the copy frame's key only
+        result, _, pasted = loopify_keyframe_table(table, copy_frame, 1, 0, paste_frame)
+        inserted += pasted
+        frames = result["co"][:, 0]
+        mask = whole_frame_key_mask(frames, window_start, window_end)
+        window_frames = frames[mask].astype(np.float64)
+        # Weight 1 at the paste frame, fading to 0 at the far edge of the window
+        u = 1.0 - np.abs(window_frames - paste_frame) / (frame_easing + 1)
+        target = extrapolated_key_values(table, window_frames - paste_frame + copy_frame)
+        results.append(result)
+        blends.append((mask, window_frames, result["co"][mask, 1].astype(np.float64), target, seam_blend_weights[blend_curve](u)))
+
+    # The four quaternion curves can only be normalized together when they are keyed on the same frames
+    if len(tables) == 4 and all(np.array_equal(blend[1], blends[0][1]) for blend in blends):
+        source = np.stack([blend[2] for blend in blends], axis=1)
+        target = np.stack([blend[3] for blend in blends], axis=1)
+        target *= np.where(np.sum(source * target, axis=1) < 0.0, -1.0, 1.0)[:, None]
+        mixed = source + blends[0][4][:, None] * (target - source)
+        mixed /= np.maximum(np.linalg.norm(mixed, axis=1), 1e-12)[:, None]
+        mixed_values = list(mixed.T)
+    else:
+        mixed_values = [values + weight * (target - values) for _, _, values, target, weight in blends]
+
+    blended = 0
+    for result, (mask, _, values, _, _), mixed in zip(results, blends, mixed_values):
+        # Move the handles with their keys; fcurve.update() recalculates the automatic ones
+        delta = (mixed - values).astype(np.float32)
+        result["co"][mask, 1] += delta
+        result["handle_left"][mask, 1] += delta
+        result["handle_right"][mask, 1] += delta
+        blended += int(np.count_nonzero(mask))
+    return results, blended, inserted
+
+
+# ----------------------------- Keyframe Reduction -----------------------------
+
+# Ramer-Douglas-Peucker over (frame, value) keys, refining every open segment at once each round.
+# A key is dropped when linear interpolation between the kept keys stays within tolerance of it.
+# Returns a mask of the keys to keep; the first and last keys and the protected ones are always kept.
+def reduce_keys_mask(frames, values, tolerance, protected=None):
+    count = len(frames)
+    keep = np.zeros(count, dtype=bool) if protected is None else protected.copy()
+    if count <= 2:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+    frames = frames.astype(np.float64)
+    values = values.astype(np.float64)
+    positions = np.arange(count)
+
+    while True:
+        kept = np.nonzero(keep)[0]
+        segment = np.clip(np.searchsorted(kept, positions, side="right") - 1, 0, len(kept) - 2)
+        start, end = kept[segment], kept[segment + 1]
+        span = frames[end] - frames[start]
+        weight = np.divide(frames - frames[start], span, out=np.zeros(count), where=span != 0)
+        error = np.abs(values - (values[start] + (values[end] - values[start]) * weight))
+        error[keep] = 0.0
+
+        # The worst key of each segment comes first when sorted by segment, then by descending error
+        order = np.lexsort((-error, segment))
+        first = np.ones(count, dtype=bool)
+        first[1:] = segment[order][1:] != segment[order][:-1]
+        worst = order[first]
+        worst = worst[error[worst] > tolerance]
+        if len(worst) == 0:
+            return keep
+        keep[worst] = True
+
+
+# Tolerance in curve units for a channel: angles for Euler and axis-angle rotations, half-angle sines for quaternion components.
+def reduction_tolerance(channel, angle_tolerance, value_tolerance):
+    if channel == "rotation_quaternion":
+        return math.sin(angle_tolerance / 2.0)
+    if channel in ("rotation_euler", "rotation_axis_angle"):
+        return angle_tolerance
+    return value_tolerance
+
+
+# ----------------------------- Bake Cache Keys -----------------------------
+
+# Hash of a bake's inputs: its settings, any JSON-able values, then the arrays of its input key tables byte for byte.
+# Two bakes share a cache entry only when every setting and key matches.
+def bake_cache_digest(settings, tables=()):
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True, default=list).encode("utf-8"))
+    for table in tables:
+        for name in sorted(table):
+            digest.update(np.ascontiguousarray(table[name]).tobytes())
+    return digest.hexdigest()
+
+
+# ----------------------------- Action Arrays -----------------------------
+# An action's F-Curves held as NumPy arrays: the keys of every curve laid end to end in one column per key attribute
+# (those of read_keyframe_table), with each curve's data path, array index and group, and an index by bone and channel.
+# Spacing, Delete, Loopify and key reduction are pure functions from one ActionArrays to a new one.
+
+class ActionArrays:
+    # curves lists (data path, array index, group) per curve and tables the key table of each
+    def __init__(self, curves, tables):
+        self.curves = list(curves)
+        self.offsets = np.zeros(len(self.curves) + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum([len(table["co"]) for table in tables])
+        empty = sampled_keyframe_table(np.zeros(0), np.zeros(0))
+        self.keys = {}
+        for name, values in empty.items():
+            column = np.concatenate([values] + [table[name] for table in tables]).astype(values.dtype, copy=False)
+            # The tables handed out are views of the columns, so the columns are locked against edits in place
+            column.flags.writeable = False
+            self.keys[name] = column
+
+        self.positions = {}
+        self.bone_positions = {}
+        self.channel_positions = {}
+        for position, (data_path, array_index, _) in enumerate(self.curves):
+            bone_name, channel = parse_pose_bone_data_path(data_path)
+            self.positions[(data_path, array_index)] = position
+            self.channel_positions[(bone_name, channel, array_index)] = position
+            if bone_name is not None:
+                self.bone_positions.setdefault(bone_name, []).append(position)
+
+    def __len__(self):
+        return len(self.curves)
+
+    # Key table of the curve at a position, as read-only views of the columns.
+    def table(self, position):
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return {name: values[start:end] for name, values in self.keys.items()}
+
+    def find(self, bone_name, channel, array_index):
+        return self.channel_positions.get((bone_name, channel, array_index))
+
+    # Positions of the curves of the given bones, optionally of one channel only.
+    def bone_curves(self, bone_names, channel=None):
+        positions = []
+        for bone_name in bone_names:
+            for position in self.bone_positions.get(bone_name, ()):
+                if channel is None or parse_pose_bone_data_path(self.curves[position][0])[1] == channel:
+                    positions.append(position)
+        return sorted(positions)
+
+    # New arrays with the tables of updates, a dict of (data path, array index) -> key table, in place of the curves'
+    # tables. Curves not there yet are added, grouped under their bone.
+    def replace(self, updates):
+        if not updates:
+            return self
+        curves = list(self.curves)
+        tables = [self.table(position) for position in range(len(curves))]
+        for (data_path, array_index), table in updates.items():
+            position = self.positions.get((data_path, array_index))
+            if position is None:
+                bone_name, _ = parse_pose_bone_data_path(data_path)
+                curves.append((data_path, array_index, bone_name or ""))
+                tables.append(table)
+            else:
+                tables[position] = table
+        return ActionArrays(curves, tables)
+
+    # New arrays without the curves at the positions.
+    def remove(self, positions):
+        positions = set(positions)
+        if not positions:
+            return self
+        kept = [position for position in range(len(self.curves)) if position not in positions]
+        return ActionArrays([self.curves[position] for position in kept], [self.table(position) for position in kept])
+
+
+# Spacing over ActionArrays: offsets is a dict of (bone name, axis index) -> list of radian deltas, applied to the
+# whole-frame keys between frame_start and frame_end. rotation_modes gives each bone's rotation mode: Euler bones get
+# the deltas added to their rotation_euler keys, quaternion bones have their keys rotated by them (rest_rotations
+# gives the quaternion a bone without some W/X/Y/Z curve holds) and axis-angle bones are skipped.
+# Returns the new arrays and the number of keys changed.
+def space_action_arrays(arrays, offsets, rotation_modes, frame_start, frame_end, rest_rotations=None):
+    bone_offsets = {}
+    for (bone_name, axis_index), deltas in offsets.items():
+        if deltas and bone_name in rotation_modes:
+            bone_offsets.setdefault(bone_name, {})[axis_index] = deltas
+
+    updates = {}
+    changed = 0
+    for bone_name, axis_deltas in bone_offsets.items():
+        rotation_mode = rotation_modes[bone_name]
+        if rotation_mode == 'QUATERNION':
+            angles = [0.0, 0.0, 0.0]
+            for axis_index, deltas in axis_deltas.items():
+                angles[axis_index] = sum(deltas)
+            positions = [arrays.find(bone_name, "rotation_quaternion", component) for component in range(4)]
+            tables = [None if position is None else arrays.table(position) for position in positions]
+            rest = (rest_rotations or {}).get(bone_name, (1.0, 0.0, 0.0, 0.0))
+            results, bone_changed = rotate_quaternion_tables(tables, frame_start, frame_end, spacing_quaternion(angles), rest)
+            for component, result in enumerate(results):
+                if result is not None:
+                    updates[(f"pose.bones[\"{bone_name}\"].rotation_quaternion", component)] = result
+            changed += bone_changed
+        elif rotation_mode != 'AXIS_ANGLE':
+            for axis_index, deltas in axis_deltas.items():
+                position = arrays.find(bone_name, "rotation_euler", axis_index)
+                if position is None:
+                    continue
+                result, curve_changed = offset_keyframe_table(arrays.table(position), frame_start, frame_end, deltas)
+                if result is not None:
+                    updates[arrays.curves[position][:2]] = result
+                    changed += curve_changed
+    return arrays.replace(updates), changed
+
+
+# Drops every curve of the bones. Returns the new arrays with the number of keys and curves removed.
+def delete_action_bones(arrays, bone_names):
+    positions = arrays.bone_curves(bone_names)
+    keys_removed = int(sum(arrays.offsets[position + 1] - arrays.offsets[position] for position in positions))
+    return arrays.remove(positions), keys_removed, len(positions)
+
+
+# Loopify over ActionArrays with the copy frame, delete range and paste frame of loopify_frames, on every curve with keys.
+# The NumPy rewrite of each curve (or of the four curves of a quaternion, crossfaded together) goes through
+# map_function, so callers can spread it over threads. Returns the new arrays, the number of keys removed (or blended,
+# for a crossfade) and inserted, and the seam frames later stages must keep.
+def loopify_action_arrays(arrays, copy_frame, delete_range_start, delete_range_end, paste_frame,
+                          seam_mode='INTERPOLATE', frame_easing=0, blend_curve='SMOOTHSTEP', map_function=map):
+    positions = [position for position in range(len(arrays)) if arrays.offsets[position + 1] > arrays.offsets[position]]
+    updates = {}
+    keys_changed = 0
+    keys_inserted = 0
+
+    if seam_mode == 'CROSSFADE':
+        # Quaternion curves are blended together, every other curve on its own
+        channels = {}
+        for position in positions:
+            data_path, array_index, _ = arrays.curves[position]
+            bone_name, channel = parse_pose_bone_data_path(data_path)
+            key = (bone_name, channel) if channel == "rotation_quaternion" else (bone_name, channel, array_index)
+            channels.setdefault(key, []).append(position)
+        groups = [sorted(group, key=lambda position: arrays.curves[position][1]) for group in channels.values()]
+        results = map_function(
+            lambda tables: crossfade_keyframe_tables(tables, copy_frame, paste_frame, frame_easing, blend_curve),
+            [[arrays.table(position) for position in group] for group in groups])
+        for group, (tables, blended, inserted) in zip(groups, results):
+            for position, table in zip(group, tables):
+                updates[arrays.curves[position][:2]] = table
+            keys_changed += blended
+            keys_inserted += inserted
+    else:
+        # Drop the delete range and paste the copy frame's key in a single rewrite
+        results = map_function(
+            lambda table: loopify_keyframe_table(table, copy_frame, delete_range_start, delete_range_end, paste_frame),
+            [arrays.table(position) for position in positions])
+        for position, (table, removed, inserted) in zip(positions, results):
+            if removed or inserted:
+                updates[arrays.curves[position][:2]] = table
+                keys_changed += removed
+                keys_inserted += inserted
+
+    # The seam is the pasted key and the keys bordering the cleared or blended range. A crossfade after the paste frame
+    # blends the frames right after it, even when Last Frame pastes before the clip.
+    if paste_frame > copy_frame or seam_mode != 'CROSSFADE':
+        window_start, window_end = delete_range_start, delete_range_end
+    else:
+        window_start, window_end = paste_frame + 1, paste_frame + frame_easing
+    seam_frames = [paste_frame, window_start - 1, window_end + 1]
+    return arrays.replace(updates), keys_changed, keys_inserted, seam_frames
+
+
+# Key reduction over ActionArrays, keeping the keys on protected frames, with each curve's tolerance picked by its
+# channel. Returns the new arrays with the number of keys before and after.
+def reduce_action_arrays(arrays, angle_tolerance, value_tolerance, protected_frames=()):
+    updates = {}
+    for position in range(len(arrays)):
+        data_path, array_index, _ = arrays.curves[position]
+        table = arrays.table(position)
+        frames = table["co"][:, 0]
+        _, channel = parse_pose_bone_data_path(data_path)
+        tolerance = reduction_tolerance(channel, angle_tolerance, value_tolerance)
+        keep = reduce_keys_mask(frames, table["co"][:, 1], tolerance, np.isin(frames, protected_frames))
+        if not np.all(keep):
+            reduced_table = {name: values[keep] for name, values in table.items()}
+            # The mask bounds the straight lines between the kept keys, so that's how they're interpolated: Bezier
+            # handles would overshoot them and play back further from the baked motion than the tolerance
+            reduced_table["interpolation"] = np.ones(len(reduced_table["co"]), dtype=np.int32)
+            updates[(data_path, array_index)] = reduced_table
+    reduced = arrays.replace(updates)
+    return reduced, len(arrays.keys["co"]), len(reduced.keys["co"])